@@ -10,3 +10,68 @@ CLIENT_SECRET = os.getenv("JOBBER_DEV_CENTER_CLIENT_SECRET")
 REFRESH_TOKEN = os.getenv("JOBBERS_REFRESH_TOKEN")
 API_VERSION = os.getenv("JOBBER_API_VERSION", "2023-08-18") 
 
+
+# Incremental sync - local cache of previously fetched quotes/jobs and their updatedAt high-water marks
+SYNC_CACHE_PATH = os.getenv("INVENTORY_SYNC_CACHE_PATH", "jobber_sync_cache.json")
+# Incremental syncs fetch records updated after the watermark minus this many seconds, so a record updated
+# in the same second as the watermark but after its page was fetched is not skipped. Records fetched twice
+# just replace their cached copy
+SYNC_WATERMARK_OVERLAP = float(os.getenv("INVENTORY_SYNC_WATERMARK_OVERLAP", "60"))
+
+# Pagination - page sizes are adapted to the API throttle budget between these bounds
+PAGE_SIZE_INITIAL = int(os.getenv("JOBBER_PAGE_SIZE_INITIAL", "5"))
+PAGE_SIZE_MIN = int(os.getenv("JOBBER_PAGE_SIZE_MIN", "5"))
+PAGE_SIZE_MAX = int(os.getenv("JOBBER_PAGE_SIZE_MAX", "100"))
+
+# HTTP retries for the Jobber API - 429 and 5xx responses are retried with exponential backoff
+JOBBER_MAX_RETRIES = int(os.getenv("JOBBER_MAX_RETRIES", "3"))
+JOBBER_RETRY_BACKOFF = float(os.getenv("JOBBER_RETRY_BACKOFF", "1.0"))
+# Times a request rejected by the API throttle (THROTTLED) is resent once the budget has restored
+JOBBER_MAX_THROTTLE_RETRIES = int(os.getenv("JOBBER_MAX_THROTTLE_RETRIES", "5"))
+
+# Worksheets each inventory view is published to - leave a name empty to skip building that view.
+# The formatted view (SKUs detected and moved into "Part No.") is not published by default.
+UNFORMATTED_SHEET_NAME = os.getenv("INVENTORY_SHEET_NAME", "Inventory")
+FORMATTED_SHEET_NAME = os.getenv("INVENTORY_FORMATTED_SHEET_NAME", "")
+
+# Resumable syncs - pagination checkpoints are written per record type as
+# <SYNC_CHECKPOINT_PREFIX>_<quotes|jobs>.json at most every SYNC_CHECKPOINT_INTERVAL seconds (0 = after every
+# page) and ignored once older than SYNC_CHECKPOINT_MAX_AGE hours
+SYNC_CHECKPOINT_PREFIX = os.getenv("INVENTORY_SYNC_CHECKPOINT_PREFIX", "jobber_sync_checkpoint")
+SYNC_CHECKPOINT_MAX_AGE = float(os.getenv("INVENTORY_SYNC_CHECKPOINT_MAX_AGE", "24"))
+SYNC_CHECKPOINT_INTERVAL = float(os.getenv("INVENTORY_SYNC_CHECKPOINT_INTERVAL", "30"))
+
+# Quote QTY / Job QTY - "count" counts the line items that mention a product, "quantity" sums their quantities.
+# Summed quantities are rounded with INVENTORY_QUANTITY_ROUNDING: "half_up", "ceil", "floor" or "none"
+QUANTITY_MODE = os.getenv("INVENTORY_QUANTITY_MODE", "count")
+QUANTITY_ROUNDING = os.getenv("INVENTORY_QUANTITY_ROUNDING", "half_up")
+
+# Server-side filters - only quotes/jobs in these Jobber statuses (comma separated, e.g.
+# "awaiting_response,approved") and created after JOBBER_CREATED_AFTER (ISO 8601) are fetched.
+# Empty fetches everything. In incremental mode every change is fetched and the filters are applied locally.
+QUOTE_STATUSES = [status.strip() for status in os.getenv("JOBBER_QUOTE_STATUSES", "").split(",") if status.strip()]
+JOB_STATUSES = [status.strip() for status in os.getenv("JOBBER_JOB_STATUSES", "").split(",") if status.strip()]
+CREATED_AFTER = os.getenv("JOBBER_CREATED_AFTER", "") or None
+
+# Sync planning (--plan, or a time budget) - before fetching, the cost and duration of the sync are projected
+# and the run fails fast if it would take longer than JOBBER_SYNC_TIME_BUDGET seconds (0 = no budget).
+# JOBBER_PAGE_LATENCY is the expected round trip of one page in seconds, and JOBBER_PLAN_SAMPLE_SIZE the
+# records fetched per record type to measure their cost, used for the projection
+SYNC_TIME_BUDGET = float(os.getenv("JOBBER_SYNC_TIME_BUDGET", "0"))
+PAGE_LATENCY = float(os.getenv("JOBBER_PAGE_LATENCY", "1.5"))
+PLAN_SAMPLE_SIZE = int(os.getenv("JOBBER_PLAN_SAMPLE_SIZE", "10"))
+
+# Extra fields to fetch on top of what the inventory pipeline reads, as comma separated dotted paths
+# (e.g. "quoteNumber,lineItems.unitCost") - only needed when an export uses them, as every field adds to the query cost
+JOB_EXTRA_FIELDS = [field.strip() for field in os.getenv("JOBBER_JOB_EXTRA_FIELDS", "").split(",") if field.strip()]
+QUOTE_EXTRA_FIELDS = [field.strip() for field in os.getenv("JOBBER_QUOTE_EXTRA_FIELDS", "").split(",") if field.strip()]
+
+# Line items - jobs are fetched with their first JOBBER_JOB_LINE_ITEM_WINDOW line items and quotes with their first
+# JOBBER_QUOTE_LINE_ITEM_WINDOW; the rest of the line items of larger records are fetched afterwards,
+# JOBBER_LINE_ITEM_PAGE_SIZE at a time for up to JOBBER_LINE_ITEM_BATCH_SIZE records per request.
+# A smaller window makes every page cheaper but costs a follow-up request for each batch of records above it.
+# Quotes usually carry more line items than jobs, hence the larger window
+JOB_LINE_ITEM_WINDOW = int(os.getenv("JOBBER_JOB_LINE_ITEM_WINDOW", "10"))
+QUOTE_LINE_ITEM_WINDOW = int(os.getenv("JOBBER_QUOTE_LINE_ITEM_WINDOW", "50"))
+LINE_ITEM_PAGE_SIZE = int(os.getenv("JOBBER_LINE_ITEM_PAGE_SIZE", "50"))
+LINE_ITEM_BATCH_SIZE = int(os.getenv("JOBBER_LINE_ITEM_BATCH_SIZE", "10"))
@@ -1,7 +1,10 @@
-import requests
 import pprint
-from queryCost import extract_query_cost, log_query_cost
-from config import API_VERSION
+from functools import lru_cache
+from datetime import timezone
+from queryCost import extract_query_cost, plan_next_page
+from syncCache import parse_timestamp
+from config import (PAGE_SIZE_INITIAL, JOB_EXTRA_FIELDS, QUOTE_EXTRA_FIELDS, JOB_LINE_ITEM_WINDOW,
+                    QUOTE_LINE_ITEM_WINDOW, LINE_ITEM_PAGE_SIZE, LINE_ITEM_BATCH_SIZE)
 
 fetch_jobs_all_data_query = """
     query FetchComprehensiveJobsData($after: String, $limit: Int!) {
@@ -126,169 +129,225 @@ fetch_jobs_all_data_query = """
     }
     """
 
-fetch_jobs_query = """
-query FetchJobLineItems($after: String, $limit: Int!) {
-  jobs(first: $limit, after: $after) {
-    nodes {
-      id
-      jobNumber
-      title
-      lineItems(first: 10) {
-        nodes {
-          id
-          name
-          description
-          quantity
-          unitCost
-          totalPrice
-          totalCost
-          category
-          taxable
-          createdAt
-          updatedAt
-          linkedProductOrService {
-            id
-            name
-            description
-            category
-            defaultUnitCost
-            internalUnitCost
-            markup
-            taxable
-            visible
-          }
-        }
-      }
-    }
-    pageInfo {
-      endCursor
-      hasNextPage
-    }
-  }
+# Fields of each record type the inventory pipeline reads: id/updatedAt for the sync cache,
+# status/createdAt for the scope filters and the line item fields the extractors use.
+# Line item fields are nested under lineItems, linked item fields under lineItems.linkedProductOrService
+PIPELINE_FIELDS = {
+    "jobs": [
+        "id", "jobStatus", "createdAt", "updatedAt",
+        "lineItems.name", "lineItems.description", "lineItems.quantity", "lineItems.category",
+        "lineItems.linkedProductOrService.name", "lineItems.linkedProductOrService.description",
+        "lineItems.linkedProductOrService.category"
+    ],
+    "quotes": [
+        "id", "quoteStatus", "createdAt", "updatedAt",
+        "lineItems.name", "lineItems.description", "lineItems.quantity",
+        "lineItems.linkedProductOrService.name", "lineItems.linkedProductOrService.description",
+        "lineItems.linkedProductOrService.category"
+    ]
 }
-"""
 
-fetch_quotes_query = """
-query FetchQuoteLineItems($after: String, $limit: Int!) {
-  quotes(first: $limit, after: $after) {
-    nodes {
-      id
-      quoteNumber
-      quoteStatus
-      title
-      lineItems(first: 50) {
-        nodes {
-          id
-          name
-          description
-          quantity
-          unitCost
-          totalPrice
-          taxable
-          createdAt
-          updatedAt
-          linkedProductOrService {
-            id
-            name
-            description
-            category
-            defaultUnitCost
-            internalUnitCost
-            markup
-            taxable
-            visible
-          }
-        }
-      }
-      jobberWebUri
-      createdAt
-      updatedAt
-    }
-    pageInfo {
+# Extra fields requested per record type, see config
+EXTRA_FIELDS = {
+    "jobs": JOB_EXTRA_FIELDS,
+    "quotes": QUOTE_EXTRA_FIELDS
+}
+
+# Nested connections and how many nodes of each are requested with the record.
+# Records with more line items get the rest from fetch_remaining_line_items
+CONNECTION_SIZES = {
+    "jobs": {"lineItems": JOB_LINE_ITEM_WINDOW},
+    "quotes": {"lineItems": QUOTE_LINE_ITEM_WINDOW}
+}
+
+# Query name, filter type and single-record root field of each record type
+QUERY_SIGNATURES = {
+    "jobs": ("FetchJobLineItems", "JobFilterAttributes", "job"),
+    "quotes": ("FetchQuoteLineItems", "QuoteFilterAttributes", "quote")
+}
+
+def selection_tree(field_paths):
+    """Turn dotted field paths (e.g. "lineItems.name") into a nested dict of selections."""
+    tree = {}
+    for path in field_paths:
+        node = tree
+        for field in path.split("."):
+            node = node.setdefault(field, {})
+    return tree
+
+def render_page_info(indent):
+    """Render the pageInfo selection of a connection."""
+    pad = " " * indent
+    return f"{pad}pageInfo {{\n{pad}  endCursor\n{pad}  hasNextPage\n{pad}}}"
+
+def render_selection(tree, connection_sizes, indent):
+    """Render a selection tree as GraphQL, wrapping nested connections in first: N { nodes { ... } pageInfo }."""
+    pad = " " * indent
+    lines = []
+    for field, children in tree.items():
+        if not children:
+            lines.append(f"{pad}{field}")
+        elif field in connection_sizes:
+            lines.append(f"{pad}{field}(first: {connection_sizes[field]}) {{")
+            lines.append(f"{pad}  nodes {{")
+            lines.append(render_selection(children, connection_sizes, indent + 4))
+            lines.append(f"{pad}  }}")
+            lines.append(render_page_info(indent + 2))
+            lines.append(f"{pad}}}")
+        else:
+            lines.append(f"{pad}{field} {{")
+            lines.append(render_selection(children, connection_sizes, indent + 2))
+            lines.append(f"{pad}}}")
+    return "\n".join(lines)
+
+def build_records_query(connection, extra_fields=()):
+    """
+    Build the paginated query for a record type that selects only what the pipeline reads.
+    
+    Every field adds to the query cost and the response size, so the selection is generated
+    from PIPELINE_FIELDS instead of asking for everything a line item has.
+    
+    Args:
+        connection (str): 'quotes' or 'jobs'
+        extra_fields (iterable): Additional dotted field paths, e.g. for an export that needs
+                                 "quoteNumber" or "lineItems.unitCost"
+        
+    Returns:
+        str: The GraphQL query, taking $after, $limit and $filter
+    """
+    query_name, filter_type, _ = QUERY_SIGNATURES[connection]
+    tree = selection_tree(list(PIPELINE_FIELDS[connection]) + list(extra_fields))
+    return f"""
+query {query_name}($after: String, $limit: Int!, $filter: {filter_type}) {{
+  {connection}(first: $limit, after: $after, filter: $filter) {{
+    nodes {{
+{render_selection(tree, CONNECTION_SIZES[connection], 6)}
+    }}
+    pageInfo {{
       endCursor
       hasNextPage
-    }
-  }
-}
+    }}
+  }}
+}}
+"""
+
+@lru_cache(maxsize=None)
+def build_line_items_query(connection, record_count):
+    """
+    Build a query that fetches the next window of line items of several records at once.
+    
+    Each record gets its own aliased root field (r0, r1, ...) with its own id and cursor,
+    so a whole batch of records with more line items costs a single request.
+    
+    Args:
+        connection (str): 'quotes' or 'jobs'
+        record_count (int): Number of records in the batch
+        
+    Returns:
+        str: The GraphQL query, taking $limit plus $id<n> and $after<n> for every record
+    """
+    _, _, record_field = QUERY_SIGNATURES[connection]
+    tree = selection_tree(list(PIPELINE_FIELDS[connection]) + list(EXTRA_FIELDS[connection]))
+    line_item_selection = render_selection(tree["lineItems"], CONNECTION_SIZES[connection], 8)
+    
+    parameters = ", ".join(f"$id{i}: EncodedId!, $after{i}: String" for i in range(record_count))
+    aliases = "\n".join(f"""  r{i}: {record_field}(id: $id{i}) {{
+    lineItems(first: $limit, after: $after{i}) {{
+      nodes {{
+{line_item_selection}
+      }}
+{render_page_info(6)}
+    }}
+  }}""" for i in range(record_count))
+    return f"""
+query FetchRemainingLineItems($limit: Int!, {parameters}) {{
+{aliases}
+}}
 """
 
-def fetch_quotes(access_token, after=None, limit=5):
-    """Fetch a limited number of quotes with line items from the Jobber GraphQL API"""
-    graphql_url = "https://api.getjobber.com/api/graphql"
+fetch_jobs_query = build_records_query("jobs", JOB_EXTRA_FIELDS)
+
+fetch_quotes_query = build_records_query("quotes", QUOTE_EXTRA_FIELDS)
+
+def build_filter(updated_after=None, status=None, created_after=None):
+    """
+    Build the filter argument of a quotes or jobs query.
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "X-JOBBER-GRAPHQL-VERSION": API_VERSION
-    }
+    Args:
+        updated_after (str): Only records changed after this ISO 8601 timestamp
+        status (str): Only records in this Jobber status (e.g. "approved")
+        created_after (str): Only records created after this ISO 8601 timestamp or date,
+            sent to Jobber in UTC like the updated_after watermark
+        
+    Returns:
+        dict: QuoteFilterAttributes / JobFilterAttributes, or None if nothing is filtered
     
+    Raises:
+        ValueError: If created_after is not an ISO 8601 timestamp
+    """
+    filter_attributes = {}
+    if updated_after:
+        filter_attributes["updatedAt"] = {"after": updated_after}
+    if status:
+        filter_attributes["status"] = status
+    if created_after:
+        created_after = parse_timestamp(created_after).astimezone(timezone.utc)
+        filter_attributes["createdAt"] = {"after": created_after.strftime("%Y-%m-%dT%H:%M:%SZ")}
+    return filter_attributes or None
+
+def fetch_quotes(client, after=None, limit=5, updated_after=None, status=None, created_after=None):
+    """
+    Fetch a limited number of quotes with line items from the Jobber GraphQL API.
+    If updated_after is given (ISO 8601 timestamp), only quotes changed after it are returned.
+    status and created_after narrow the quotes down further on the server, see build_filter.
+    """
     # Create variables object with both cursor and limit
     variables = {
         "limit": limit
     }
     if after:
         variables["after"] = after
+    filter_attributes = build_filter(updated_after, status, created_after)
+    if filter_attributes:
+        variables["filter"] = filter_attributes
     
-    response = requests.post(
-        graphql_url,
-        headers=headers,
-        json={
+    return client.execute(
+        {
             "query": fetch_quotes_query,
             "variables": variables
-        }
+        },
+        "Fetch Quotes",
+        units=limit,
+        error_message="Failed to fetch quotes"
     )
-    
-    if response.status_code == 200:
-        response_data = response.json()
-        # Log query cost information
-        log_query_cost(response_data, "Fetch Quotes")
-        return response_data
-    else:
-        raise Exception(f"Failed to fetch quotes: {response.text}")
 
-def fetch_jobs(access_token, after=None, limit=5):
-    """Fetch a limited number of jobs with all available fields from the Jobber GraphQL API"""
-    graphql_url = "https://api.getjobber.com/api/graphql"
-    
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "X-JOBBER-GRAPHQL-VERSION": API_VERSION
-    }
-    
+def fetch_jobs(client, after=None, limit=5, updated_after=None, status=None, created_after=None):
+    """
+    Fetch a limited number of jobs with all available fields from the Jobber GraphQL API.
+    If updated_after is given (ISO 8601 timestamp), only jobs changed after it are returned.
+    status and created_after narrow the jobs down further on the server, see build_filter.
+    """
     # Create variables object with both cursor and limit
     variables = {
         "limit": limit
     }
     if after:
         variables["after"] = after
+    filter_attributes = build_filter(updated_after, status, created_after)
+    if filter_attributes:
+        variables["filter"] = filter_attributes
     
-    response = requests.post(
-        graphql_url,
-        headers=headers,
-        json={
+    return client.execute(
+        {
             "query": fetch_jobs_query,
             "variables": variables
-        }
+        },
+        "Fetch Jobs",
+        units=limit,
+        error_message="Failed to fetch jobs"
     )
-    
-    if response.status_code == 200:
-        response_data = response.json()
-        # Log query cost information
-        log_query_cost(response_data, "Fetch Jobs")
-        return response_data
-    else:
-        raise Exception(f"Failed to fetch jobs: {response.text}")
 
-def fetch_jobs_all_data(access_token, after=None, limit=8):
-    graphql_url = "https://api.getjobber.com/api/graphql"
-    
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "X-JOBBER-GRAPHQL-VERSION": API_VERSION
-    }
-    
+def fetch_jobs_all_data(client, after=None, limit=8):
     # Create variables object with both cursor and limit
     variables = {
         "limit": limit
@@ -296,90 +355,179 @@ def fetch_jobs_all_data(access_token, after=None, limit=8):
     if after:
         variables["after"] = after
     
-    response = requests.post(
-        graphql_url,
-        headers=headers,
-        json={
+    return client.execute(
+        {
             "query": fetch_jobs_all_data_query,
             "variables": variables
-        }
+        },
+        "Fetch Jobs All Data",
+        units=limit,
+        error_message="Failed to fetch jobs"
     )
-    
-    if response.status_code == 200:
-        response_data = response.json()
-        # Log query cost information
-        log_query_cost(response_data, "Fetch Jobs")
-        return response_data
-    else:
-        raise Exception(f"Failed to fetch jobs: {response.text}")
 
-def get_job_count(access_token):
-    """Get the total count of jobs from the Jobber GraphQL API"""
-    graphql_url = "https://api.getjobber.com/api/graphql"
-    
+def get_job_count(client, filter_attributes=None):
+    """
+    Get the total count of jobs from the Jobber GraphQL API.
+    filter_attributes (see build_filter) only counts the jobs a filtered fetch would return.
+    """
     # GraphQL query to get only the total count of jobs
     query = """
-    query GetJobCount {
-      jobs {
+    query GetJobCount($filter: JobFilterAttributes) {
+      jobs(filter: $filter) {
         totalCount
       }
     }
     """
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "X-JOBBER-GRAPHQL-VERSION": API_VERSION
-    }
-    
-    response = requests.post(
-        graphql_url,
-        headers=headers,
-        json={"query": query}
-    )
+    response_data = client.execute({"query": query, "variables": {"filter": filter_attributes}},
+                                   "Get Job Count", error_message="Failed to get job count")
     
-    if response.status_code == 200:
-        response_data = response.json()
-        # Log query cost information
-        log_query_cost(response_data, "Get Job Count")
-        
-        # Extract and return the count
-        return response_data.get('data', {}).get('jobs', {}).get('totalCount', 0)
-    else:
-        raise Exception(f"Failed to get job count: {response.text}")
+    # Extract and return the count
+    return response_data.get('data', {}).get('jobs', {}).get('totalCount', 0)
 
-def get_quote_count(access_token):
-    """Get the total count of quotes from the Jobber GraphQL API"""
-    graphql_url = "https://api.getjobber.com/api/graphql"
-    
+def get_quote_count(client, filter_attributes=None):
+    """
+    Get the total count of quotes from the Jobber GraphQL API.
+    filter_attributes (see build_filter) only counts the quotes a filtered fetch would return.
+    """
     # GraphQL query to get only the total count of quotes
     query = """
-    query GetQuoteCount {
-      quotes {
+    query GetQuoteCount($filter: QuoteFilterAttributes) {
+      quotes(filter: $filter) {
         totalCount
       }
     }
     """
     
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-        "X-JOBBER-GRAPHQL-VERSION": API_VERSION
-    }
+    response_data = client.execute({"query": query, "variables": {"filter": filter_attributes}},
+                                   "Get Quote Count", error_message="Failed to get quote count")
     
-    response = requests.post(
-        graphql_url,
-        headers=headers,
-        json={"query": query}
-    )
+    # Extract and return the count
+    return response_data.get('data', {}).get('quotes', {}).get('totalCount', 0)
+
+def paginate(fetch_page, client, connection, limit=PAGE_SIZE_INITIAL, after=None, **fetch_kwargs):
+    """
+    Walk every page of a Jobber connection, sizing each page to the current throttle budget.
+    
+    After each page the reported query cost is used to pick the largest next page that the
+    available points can pay for. There are no fixed pauses between pages: the throttle
+    bucket in JobberClient.execute delays a page only as long as the restore rate needs.
+    
+    Args:
+        fetch_page (callable): fetch_quotes or fetch_jobs
+        client (JobberClient): The shared Jobber API client
+        connection (str): Name of the connection in the response data ('quotes' or 'jobs')
+        limit (int): Size of the first page
+        after (str): Cursor to start after, e.g. to resume an interrupted sync (default: first page)
+        **fetch_kwargs: Extra arguments passed through to fetch_page (e.g. updated_after)
+        
+    Yields:
+        tuple: (nodes of the page, endCursor of the page)
+    """
+    cursor = after
+    has_next_page = True
+    
+    while has_next_page:
+        response_data = fetch_page(client, after=cursor, limit=limit, **fetch_kwargs)
+        page = response_data["data"][connection]
+        # endCursor is null on an empty page, so keep the previous cursor in that case
+        cursor = page["pageInfo"]["endCursor"] or cursor
+        has_next_page = page["pageInfo"]["hasNextPage"]
+        yield page["nodes"], cursor
+        
+        if not has_next_page:
+            break
+        
+        next_limit = plan_next_page(extract_query_cost(response_data), limit)
+        if next_limit != limit:
+            print(f"Adjusting {connection} page size from {limit} to {next_limit}")
+            limit = next_limit
+
+def paginate_statuses(fetch_page, client, connection, statuses=None, after=None, **fetch_kwargs):
+    """
+    Walk every page of a Jobber connection once per status to filter on.
+    
+    The status filter takes a single status, so each status is paginated on its own.
+    Cursors are returned as [status index, endCursor] so an interrupted walk can be
+    resumed in the right status.
     
-    if response.status_code == 200:
-        response_data = response.json()
-        # Log query cost information
-        log_query_cost(response_data, "Get Quote Count")
+    Args:
+        fetch_page (callable): fetch_quotes or fetch_jobs
+        client (JobberClient): The shared Jobber API client
+        connection (str): Name of the connection in the response data ('quotes' or 'jobs')
+        statuses (list): Statuses to fetch (default: every status, without a status filter)
+        after (list): [status index, cursor] to resume after (default: first page)
+        **fetch_kwargs: Extra arguments passed through to fetch_page (e.g. updated_after)
         
-        # Extract and return the count
-        return response_data.get('data', {}).get('quotes', {}).get('totalCount', 0)
-    else:
-        raise Exception(f"Failed to get quote count: {response.text}")
+    Yields:
+        tuple: (nodes of the page, [status index, endCursor of the page])
+    """
+    statuses = statuses or [None]
+    start_index, cursor = after if after else (0, None)
+    for status_index in range(start_index, len(statuses)):
+        status = statuses[status_index]
+        if status:
+            print(f"Fetching {connection} with status {status}")
+        page_after = cursor if status_index == start_index else None
+        for nodes, end_cursor in paginate(fetch_page, client, connection, after=page_after,
+                                          status=status, **fetch_kwargs):
+            yield nodes, [status_index, end_cursor]
+
+def has_more_line_items(record):
+    """Check whether a record has line items beyond the ones fetched so far."""
+    page_info = (record.get("lineItems") or {}).get("pageInfo") or {}
+    return bool(page_info.get("hasNextPage"))
 
+def fetch_remaining_line_items(client, connection, records, limit=LINE_ITEM_PAGE_SIZE,
+                               batch_size=LINE_ITEM_BATCH_SIZE):
+    """
+    Complete the line items of records that have more than the window fetched with them.
+    
+    Records are fetched with a small line item window to keep every page cheap. Only the
+    records whose lineItems report another page are followed up, batch_size records per
+    aliased request, until every record has all its line items. The records are updated
+    in place.
+    
+    Args:
+        client (JobberClient): The shared Jobber API client
+        connection (str): 'quotes' or 'jobs'
+        records (list): Records of a page, as returned by fetch_quotes or fetch_jobs
+        limit (int): Line items to fetch per record and request
+        batch_size (int): Records per request
+        
+    Returns:
+        int: Number of line items added
+    """
+    pending = [record for record in records if has_more_line_items(record)]
+    added = 0
+    
+    while pending:
+        batch, pending = pending[:batch_size], pending[batch_size:]
+        variables = {"limit": limit}
+        for i, record in enumerate(batch):
+            variables[f"id{i}"] = record["id"]
+            variables[f"after{i}"] = record["lineItems"]["pageInfo"]["endCursor"]
+        
+        response_data = client.execute(
+            {
+                "query": build_line_items_query(connection, len(batch)),
+                "variables": variables
+            },
+            "Fetch Remaining Line Items",
+            units=len(batch),
+            error_message="Failed to fetch remaining line items"
+        )
+        
+        for i, record in enumerate(batch):
+            line_items = (response_data["data"].get(f"r{i}") or {}).get("lineItems")
+            if not line_items:
+                # The record is gone, keep the line items we already have
+                record["lineItems"]["pageInfo"]["hasNextPage"] = False
+                continue
+            record["lineItems"]["nodes"].extend(line_items["nodes"])
+            record["lineItems"]["pageInfo"] = line_items["pageInfo"]
+            added += len(line_items["nodes"])
+            if has_more_line_items(record):
+                pending.append(record)
+    
+    return added
@@ -1,11 +1,19 @@
 import os
+import json
 import gspread
+from gspread.utils import ValueRenderOption, ValueInputOption, rowcol_to_a1, absolute_range_name, fill_gaps
 from oauth2client.service_account import ServiceAccountCredentials
 from dotenv import load_dotenv
+import time
 from time import sleep
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from syncCache import write_json_atomically
 
 # Configure logging
 logging.basicConfig(
@@ -33,12 +41,30 @@ COLUMN_HEADERS = [
     "Total allocated",
     "Available QTY"
 ]
+# Only these columns hold formulas. Every other cell is written RAW, so names, SKUs and descriptions
+# that look like numbers or dates ("007", "3/4") stay text and still match what we upload next time
+FORMULA_COLUMNS = {COLUMN_HEADERS.index("Total allocated") + 1, COLUMN_HEADERS.index("Available QTY") + 1}
+# Use one ARRAYFORMULA per derived column (Total allocated, Available QTY) instead of a formula per row
+USE_ARRAY_FORMULAS = os.getenv("SHEETS_USE_ARRAY_FORMULAS", "false").lower() in ("1", "true", "yes")
+# Local copy of what each worksheet held after our last write, so uploads can skip reading the whole sheet.
+# Set to an empty string to always read the sheet. Only the key columns are checked against the sheet, so
+# a mirror older than SHEETS_MIRROR_MAX_AGE hours is not trusted and the sheet is read in full again,
+# which corrects hand edits to the other columns (0 = always read the sheet)
+SHEET_MIRROR_PATH = os.getenv("SHEETS_MIRROR_PATH", "sheet_state_mirror.json")
+SHEET_MIRROR_MAX_AGE = float(os.getenv("SHEETS_MIRROR_MAX_AGE", "24"))
+# Sheets API quota handling: the API allows 60 requests per minute per user and answers 429
+# (or 503 when busy) above that. Large writes are split into requests of at most
+# SHEETS_MAX_CELLS_PER_REQUEST cells that are sent up to SHEETS_WRITE_CONCURRENCY at a time
+SHEETS_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_REQUESTS_PER_MINUTE", "60"))
+SHEETS_WRITE_CONCURRENCY = int(os.getenv("SHEETS_WRITE_CONCURRENCY", "4"))
+SHEETS_MAX_CELLS_PER_REQUEST = int(os.getenv("SHEETS_MAX_CELLS_PER_REQUEST", "10000"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+SHEETS_RETRY_BACKOFF = float(os.getenv("SHEETS_RETRY_BACKOFF", "1.0"))
 logger.debug(f"Using sheet name: {SHEET_NAME}")
 logger.debug(f"Column headers: {COLUMN_HEADERS}")
 
-def get_google_sheets_client():
-    """Initialize and return a Google Sheets client."""
-    logger.info("Initializing Google Sheets client")
+def load_google_credentials():
+    """Load the service account credentials used for the Google Sheets API."""
     # Define the scope
     scope = ['https://spreadsheets.google.com/feeds',
              'https://www.googleapis.com/auth/drive']
@@ -66,9 +92,84 @@ def get_google_sheets_client():
         logger.error(f"Failed to load credentials: {e}", exc_info=True)
         raise
     
-    # Return the client
+    return creds
+
+def get_google_sheets_client():
+    """Initialize and return a Google Sheets client."""
+    logger.info("Initializing Google Sheets client")
+    client = gspread.authorize(load_google_credentials())
     logger.info("Google Sheets client initialized successfully")
-    return gspread.authorize(creds)
+    return client
+
+def is_auth_error(error):
+    """Check whether an API error was caused by expired or revoked credentials."""
+    return "invalid_grant" in str(error) or "expired" in str(error)
+
+def is_quota_error(error):
+    """Check whether an API error is a rate limit (429) or a temporarily unavailable backend (503)."""
+    code = getattr(error, "code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    return code in (429, 503) or "RESOURCE_EXHAUSTED" in str(error)
+
+class RequestRateLimiter:
+    """
+    Thread-safe sliding window limiter that keeps us under the Sheets per-minute quota.
+    
+    Every API request calls acquire() first, which blocks until one more request fits
+    in the last 60 seconds.
+    """
+    
+    def __init__(self, requests_per_minute=SHEETS_REQUESTS_PER_MINUTE, window=60.0):
+        self.requests_per_minute = max(1, requests_per_minute)
+        self.window = window
+        self.sent = deque()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until another request may be sent, then record it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.sent and now - self.sent[0] >= self.window:
+                    self.sent.popleft()
+                if len(self.sent) < self.requests_per_minute:
+                    self.sent.append(now)
+                    return
+                wait_time = self.window - (now - self.sent[0])
+            logger.info(f"Sheets request quota reached, waiting {wait_time:.1f} seconds")
+            sleep(wait_time)
+
+# Shared by every Sheets request in this process
+sheets_rate_limiter = RequestRateLimiter()
+
+def call_with_backoff(func, *args, max_retries=SHEETS_MAX_RETRIES, backoff_factor=SHEETS_RETRY_BACKOFF, **kwargs):
+    """
+    Call a Sheets API function under the rate limiter, retrying quota errors.
+    
+    429/503 responses are retried with exponential backoff and full jitter, so concurrent
+    writers that were throttled together don't all retry at the same moment.
+    
+    Args:
+        func: The gspread call to make
+        max_retries (int): How often to retry a quota error before giving up
+        backoff_factor (float): Base delay in seconds, doubled on every retry
+        
+    Returns:
+        Whatever func returns
+    """
+    attempt = 0
+    while True:
+        sheets_rate_limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if not is_quota_error(e) or attempt >= max_retries:
+                raise
+            delay = random.uniform(0, backoff_factor * (2 ** attempt))
+            attempt += 1
+            logger.warning(f"Sheets quota error, retry {attempt}/{max_retries} in {delay:.1f} seconds: {e}")
+            sleep(delay)
 
 def refresh_auth_if_needed(func):
     """Decorator to refresh auth token if needed."""
@@ -80,8 +181,10 @@ def refresh_auth_if_needed(func):
             try:
                 return func(*args, **kwargs)
             except gspread.exceptions.APIError as e:
-                if ("invalid_grant" in str(e) or "expired" in str(e)) and retry_count < max_retries - 1:
+                if is_auth_error(e) and retry_count < max_retries - 1:
                     logger.warning("Auth token expired, refreshing...")
+                    # Drop the cached client and handles so the retry re-authorizes
+                    sheets_session.reset()
                     retry_count += 1
                     sleep(1)  # Small delay before retry
                 else:
@@ -90,6 +193,439 @@ def refresh_auth_if_needed(func):
     
     return wrapper
 
+class SheetsSession:
+    """
+    Reusable Google Sheets session for the lifetime of the process.
+    
+    Loading the service account credentials, authorizing, opening the spreadsheet and
+    looking up its worksheets each cost time or API calls, so they are done once and the
+    handles are reused by every upload (e.g. both uploads of a --all run).
+    gspread's google-auth session refreshes the access token by itself, so the client is
+    only rebuilt when reset() is called after an auth failure.
+    """
+    
+    def __init__(self, sheet_id=None):
+        self.sheet_id = sheet_id
+        self.credentials = None
+        self.client = None
+        self.spreadsheet = None
+        # Worksheets already looked up, keyed on name
+        self.worksheets = {}
+    
+    def reset(self):
+        """Forget the client and all handles so the next call re-authorizes."""
+        self.credentials = None
+        self.client = None
+        self.spreadsheet = None
+        self.worksheets = {}
+    
+    def get_client(self):
+        """Return the authorized client, authorizing on first use or after reset()."""
+        if self.client is None:
+            logger.info("Initializing Google Sheets client")
+            self.credentials = load_google_credentials()
+            self.client = gspread.authorize(self.credentials)
+            logger.info("Google Sheets client initialized successfully")
+        return self.client
+    
+    def get_spreadsheet(self):
+        """Return the spreadsheet handle, opening it on first use."""
+        client = self.get_client()
+        if self.spreadsheet is None:
+            sheet_id = self.sheet_id or os.getenv('GOOGLE_SHEETS_ID')
+            if not sheet_id:
+                logger.error("GOOGLE_SHEETS_ID not found in environment variables")
+                raise ValueError("GOOGLE_SHEETS_ID not found in environment variables")
+            self.spreadsheet = client.open_by_key(sheet_id)
+            logger.debug(f"Opened spreadsheet: {self.spreadsheet.title}")
+        return self.spreadsheet
+    
+    def get_worksheet(self, sheet_name=SHEET_NAME):
+        """Return a worksheet, creating it if it doesn't exist."""
+        return self.get_worksheets([sheet_name]).get(sheet_name)
+    
+    def get_worksheets(self, sheet_names):
+        """
+        Return the named worksheets, keyed on name.
+        
+        Worksheets that haven't been used yet are looked up with a single metadata request
+        for all of them, and created if they don't exist. Their headers are checked by the
+        upload, which reads them together with the rows. Worksheets that could not be
+        created are left out.
+        """
+        missing = [name for name in sheet_names if name not in self.worksheets]
+        if missing:
+            spreadsheet = self.get_spreadsheet()
+            existing = {worksheet.title: worksheet for worksheet in call_with_backoff(spreadsheet.worksheets)}
+            for sheet_name in missing:
+                try:
+                    self.worksheets[sheet_name] = open_worksheet(spreadsheet, sheet_name, existing)
+                except Exception as e:
+                    if isinstance(e, gspread.exceptions.APIError) and is_auth_error(e):
+                        raise
+                    logger.error(f"Error creating worksheet {sheet_name}: {e}")
+        return {name: self.worksheets[name] for name in sheet_names if name in self.worksheets}
+
+# Shared by every upload in this process
+sheets_session = SheetsSession()
+
+def column_letter(col_idx):
+    """Return the A1 column letter(s) for a 0-based column index - also past column Z."""
+    return rowcol_to_a1(1, col_idx + 1)[:-1]
+
+def derived_formulas(row_num, name_idx, current_inv_idx, quote_idx, job_idx, array_formulas=USE_ARRAY_FORMULAS):
+    """
+    Return the formulas a row should hold in the Total allocated and Available QTY columns.
+    
+    Total allocated is Quote QTY + Job QTY and Available QTY is Current Inv - Job QTY.
+    In array formula mode the first data row holds one ARRAYFORMULA per column that covers
+    every row, and every other row must stay empty so the arrays can expand into it.
+    
+    The array formulas are written by the upload rather than installed by prepare_worksheet:
+    they have to sit on the first data row, and a formula-only row written before any part
+    would be read back as an item row with an empty key. Checking them costs no request, since
+    the first data row is read with the rest of the sheet (or taken from the mirror), and they
+    are only written when missing or stale.
+    
+    Args:
+        row_num (int): 1-based row number in the sheet
+        name_idx, current_inv_idx, quote_idx, job_idx (int): 0-based column indices
+        array_formulas (bool): Whether the sheet uses column-wide array formulas
+        
+    Returns:
+        tuple: (Total allocated value, Available QTY value)
+    """
+    name_col = column_letter(name_idx)
+    current_inv_col = column_letter(current_inv_idx)
+    quote_col = column_letter(quote_idx)
+    job_col = column_letter(job_idx)
+    
+    if not array_formulas:
+        return (f"={quote_col}{row_num}+{job_col}{row_num}",
+                f"={current_inv_col}{row_num}-{job_col}{row_num}")
+    
+    first_row = HEADER_ROW_OFFSET + 1
+    if row_num != first_row:
+        return "", ""
+    
+    # Leave the derived cells blank on rows without a part
+    blank_if_no_part = f'IF({name_col}{first_row}:{name_col}="",""'
+    return (f"=ARRAYFORMULA({blank_if_no_part},{quote_col}{first_row}:{quote_col}+{job_col}{first_row}:{job_col}))",
+            f"=ARRAYFORMULA({blank_if_no_part},{current_inv_col}{first_row}:{current_inv_col}-{job_col}{first_row}:{job_col}))")
+
+def normalize_cell_value(value):
+    """
+    Normalize a cell value so values read back from the sheet compare equal to the ones we write.
+    The API returns numbers as int/float and empty cells as "", while we write ints, strings and None.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+def queue_cell_update(pending_cells, current_row, row_num, col_idx, value):
+    """
+    Queue a cell update only if the sheet doesn't already hold that value.
+    
+    Args:
+        pending_cells (dict): Cell writes for this run, keyed on (row, column) - both 1-based
+        current_row (list): The row as it is in the sheet right now
+        row_num (int): 1-based row number of the cell in the sheet
+        col_idx (int): 0-based column index of the cell
+        value: The value (or formula) the cell should hold
+        
+    Returns:
+        bool: True if the cell was queued
+    """
+    current_value = current_row[col_idx] if col_idx < len(current_row) else ""
+    if normalize_cell_value(current_value) == normalize_cell_value(value):
+        return False
+    pending_cells[(row_num, col_idx + 1)] = value
+    return True
+
+def normalize_write_value(value):
+    """Values sent to the API must be JSON scalars, and None clears nothing - write "" instead."""
+    return "" if value is None else value
+
+def build_value_ranges(sheet_name, pending_cells, max_cells=SHEETS_MAX_CELLS_PER_REQUEST):
+    """
+    Group queued cell writes into as few rectangular A1 ranges as possible.
+    
+    Cells next to each other in a row are joined into one run, and runs covering the same
+    columns on consecutive rows are stacked into one block, so e.g. a block of new rows or
+    a column of changed counts becomes a single range.
+    
+    Args:
+        sheet_name (str): Worksheet the cells belong to
+        pending_cells (dict): Cell writes keyed on (row, column) - both 1-based
+        max_cells (int): Blocks are cut into ranges of at most this many cells (at least one row)
+        
+    Returns:
+        list: Value ranges ({"range": ..., "values": ...}) for a values.batchUpdate request
+    """
+    # Join horizontally adjacent cells into runs: [row, first column, values]
+    runs = []
+    for (row, col) in sorted(pending_cells):
+        value = normalize_write_value(pending_cells[(row, col)])
+        if runs and runs[-1][0] == row and runs[-1][1] + len(runs[-1][2]) == col:
+            runs[-1][2].append(value)
+        else:
+            runs.append([row, col, [value]])
+    
+    # Stack runs with the same columns on consecutive rows into blocks: [first row, first column, rows]
+    blocks = []
+    for row, col, values in runs:
+        if blocks:
+            first_row, first_col, rows = blocks[-1]
+            if (first_col == col and len(rows[0]) == len(values) and first_row + len(rows) == row
+                    and (len(rows) + 1) * len(values) <= max_cells):
+                rows.append(values)
+                continue
+        blocks.append([row, col, [values]])
+    
+    value_ranges = []
+    for first_row, first_col, rows in blocks:
+        top_left = rowcol_to_a1(first_row, first_col)
+        bottom_right = rowcol_to_a1(first_row + len(rows) - 1, first_col + len(rows[0]) - 1)
+        value_ranges.append({
+            "range": absolute_range_name(sheet_name, f"{top_left}:{bottom_right}"),
+            "values": rows
+        })
+    return value_ranges
+
+def group_value_ranges(value_ranges, max_cells=SHEETS_MAX_CELLS_PER_REQUEST):
+    """Split value ranges into groups of at most max_cells cells, one group per request."""
+    groups = []
+    group_cells = 0
+    for value_range in value_ranges:
+        cells = len(value_range["values"]) * len(value_range["values"][0])
+        if not groups or group_cells + cells > max_cells:
+            groups.append([])
+            group_cells = 0
+        groups[-1].append(value_range)
+        group_cells += cells
+    return groups
+
+def split_formula_cells(pending_cells):
+    """
+    Split queued cell writes into plain values and formulas.
+    
+    Args:
+        pending_cells (dict): Cell writes keyed on (row, column) - both 1-based
+        
+    Returns:
+        tuple: (value cells, formula cells) - formula cells are those in FORMULA_COLUMNS below the metadata rows
+    """
+    value_cells, formula_cells = {}, {}
+    for (row, col), value in pending_cells.items():
+        is_formula = row > HEADER_ROW_OFFSET and col in FORMULA_COLUMNS
+        (formula_cells if is_formula else value_cells)[(row, col)] = value
+    return value_cells, formula_cells
+
+def write_value_ranges(spreadsheet, value_ranges, max_cells=SHEETS_MAX_CELLS_PER_REQUEST,
+                       concurrency=SHEETS_WRITE_CONCURRENCY, value_input_option=ValueInputOption.user_entered):
+    """
+    Send the value ranges with as few values.batchUpdate requests as possible.
+    
+    Usually everything fits in one request. Large writes (e.g. a first load of the whole
+    inventory) are split into requests of at most max_cells cells. The ranges never overlap,
+    so those requests are sent concurrently, under the rate limiter and with quota retries.
+    
+    Args:
+        spreadsheet: gspread Spreadsheet the ranges belong to
+        value_ranges (list): Ranges built by build_value_ranges (may span several worksheets)
+        max_cells (int): Most cells to send in one request
+        concurrency (int): Most requests in flight at the same time
+        value_input_option: RAW stores the values as they are, USER_ENTERED parses them like typed input (formulas)
+    """
+    if not value_ranges:
+        return
+    groups = group_value_ranges(value_ranges, max_cells)
+    cell_count = sum(len(r["values"]) * len(r["values"][0]) for r in value_ranges)
+    logger.info(f"Writing {cell_count} cells in {len(value_ranges)} ranges with {len(groups)} batch update(s)")
+    
+    def send(group):
+        call_with_backoff(spreadsheet.values_batch_update, body={
+            "valueInputOption": value_input_option,
+            "data": group
+        })
+    
+    if len(groups) == 1 or concurrency <= 1:
+        for group in groups:
+            send(group)
+        return
+    
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(groups))) as executor:
+        # list() re-raises the first failed request here
+        list(executor.map(send, groups))
+
+def apply_pending_cells(rows, pending_cells):
+    """
+    Return a copy of the sheet rows (header row onward) with the queued cell writes applied,
+    i.e. what the sheet holds once the batch update went through.
+    """
+    rows = [list(row) for row in rows]
+    for (row_num, col), value in pending_cells.items():
+        row_idx = row_num - HEADER_ROW_OFFSET
+        if row_idx < 0:
+            continue  # Metadata rows above the headers aren't mirrored
+        while len(rows) <= row_idx:
+            rows.append([])
+        row = rows[row_idx]
+        if len(row) < col:
+            row.extend([""] * (col - len(row)))
+        row[col - 1] = normalize_write_value(value)
+    return rows
+
+def trim_row(row):
+    """Drop a row's trailing empty cells, as the API does when it returns a range."""
+    cells = list(row)
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+def key_columns(rows, last_col_idx):
+    """
+    Reduce sheet rows to their first columns (up to last_col_idx) with values normalized
+    and trailing empty cells/rows dropped, the same shape the API returns for a range read.
+    """
+    columns = []
+    for row in rows:
+        cells = [normalize_cell_value(value) for value in row[:last_col_idx + 1]]
+        while cells and cells[-1] == "":
+            cells.pop()
+        columns.append(cells)
+    while columns and not columns[-1]:
+        columns.pop()
+    return columns
+
+def mirror_key(worksheet):
+    """Identify a worksheet in the mirror file by its spreadsheet and title."""
+    return f"{getattr(worksheet.spreadsheet, 'id', '')}/{worksheet.title}"
+
+def load_sheet_mirrors(mirror_path=SHEET_MIRROR_PATH):
+    """Load all mirrored worksheets, or an empty dict if there is no usable mirror file."""
+    if not mirror_path or not os.path.exists(mirror_path):
+        return {}
+    try:
+        with open(mirror_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read sheet mirror {mirror_path}: {e}")
+        return {}
+
+def save_sheet_mirror(worksheet, rows, mirror_path=SHEET_MIRROR_PATH):
+    """
+    Remember what a worksheet holds after our write. Passing rows=None forgets the
+    worksheet, e.g. after a failed write, so the next upload reads it in full.
+    """
+    if not mirror_path:
+        return
+    mirrors = load_sheet_mirrors(mirror_path)
+    if rows is None:
+        if mirrors.pop(mirror_key(worksheet), None) is None:
+            return
+    else:
+        mirrors[mirror_key(worksheet)] = {"rows": rows, "saved_at": datetime.now().isoformat()}
+    try:
+        write_json_atomically(mirrors, mirror_path)
+    except OSError as e:
+        logger.warning(f"Could not write sheet mirror {mirror_path}: {e}")
+
+def mirror_is_fresh(mirror, max_age=SHEET_MIRROR_MAX_AGE):
+    """Check whether a mirror was saved less than max_age hours ago."""
+    try:
+        saved_at = datetime.fromisoformat(mirror["saved_at"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return datetime.now() - saved_at < timedelta(hours=max_age)
+
+def data_range(worksheet, last_col_idx=None):
+    """A1 range of a worksheet from the header row down, up to last_col_idx (default: every column)."""
+    if last_col_idx is None:
+        last_col_idx = worksheet.col_count - 1
+    return absolute_range_name(worksheet.title, f"A{HEADER_ROW_OFFSET}:{column_letter(last_col_idx)}")
+
+def read_sheets_rows(spreadsheet, worksheets, mirror_path=SHEET_MIRROR_PATH, max_age=SHEET_MIRROR_MAX_AGE):
+    """
+    Return the rows of several worksheets from the header row onward, with formulas as formulas,
+    read with a single values.batchGet request for all of them.
+    
+    If we have a mirror of our last write to a worksheet, only its header row and its Part and
+    Part No. columns are read and compared against the mirror. The key columns decide which
+    row every item lives on, so when they still match (nobody added, removed or re-sorted rows)
+    the mirror is used instead of downloading the whole sheet. Worksheets without a usable
+    mirror are read in full in the same request; those whose mirror turns out to be stale are
+    read in full with one more request.
+    
+    Hand edits to the other columns (Description, Quote QTY, Job QTY or the formulas) don't
+    show up in the key columns, so while the mirror is used they are not corrected. The
+    mirror is therefore only trusted for max_age hours after it was saved, after which the
+    sheet is read in full and such edits are overwritten with the synced values again.
+    
+    Args:
+        spreadsheet: gspread Spreadsheet the worksheets belong to
+        worksheets (list): gspread Worksheets to read
+        mirror_path (str): Path to the mirror file, empty to disable the mirror
+        max_age (float): Hours a mirror is trusted for
+        
+    Returns:
+        dict: Rows starting at the header row, keyed on worksheet title
+    """
+    mirrors = load_sheet_mirrors(mirror_path)
+    # Worksheet title -> (mirrored rows, last key column), for the worksheets checked against their mirror
+    checked = {}
+    ranges = []
+    for worksheet in worksheets:
+        mirror = mirrors.get(mirror_key(worksheet))
+        if mirror and not mirror_is_fresh(mirror, max_age):
+            logger.info(f"Sheet mirror of {worksheet.title} is older than {max_age:g} hours, reading the full sheet")
+            mirror = None
+        headers = mirror["rows"][0] if mirror and mirror.get("rows") else []
+        if "Part" in headers and "Part No." in headers:
+            last_key_idx = max(headers.index("Part"), headers.index("Part No."))
+            checked[worksheet.title] = (mirror["rows"], last_key_idx)
+            ranges.append(absolute_range_name(worksheet.title, f"{HEADER_ROW_OFFSET}:{HEADER_ROW_OFFSET}"))
+            ranges.append(data_range(worksheet, last_key_idx))
+        else:
+            ranges.append(data_range(worksheet))
+    
+    def batch_get(ranges):
+        if not ranges:
+            return []
+        response = call_with_backoff(spreadsheet.values_batch_get, ranges,
+                                     params={"valueRenderOption": ValueRenderOption.formula})
+        return [value_range.get("values", []) for value_range in response.get("valueRanges", [])]
+    
+    def padded(rows):
+        # The API drops trailing empty cells, get_all_values pads every row to the same width
+        return fill_gaps(rows) if rows else []
+    
+    logger.info(f"Fetching sheet data of {len(worksheets)} worksheet(s)")
+    values = iter(batch_get(ranges))
+    sheet_rows = {}
+    stale = []
+    for worksheet in worksheets:
+        if worksheet.title not in checked:
+            sheet_rows[worksheet.title] = padded(next(values))
+            continue
+        rows, last_key_idx = checked[worksheet.title]
+        sheet_headers, sheet_keys = next(values), next(values)
+        if sheet_headers[:1] == [rows[0]] and key_columns(sheet_keys, last_key_idx) == key_columns(rows, last_key_idx):
+            logger.info(f"Sheet mirror of {worksheet.title} matches, skipping the full sheet read")
+            sheet_rows[worksheet.title] = rows
+        else:
+            logger.info(f"Sheet mirror of {worksheet.title} is stale, reading the full sheet")
+            stale.append(worksheet)
+    for worksheet, rows in zip(stale, batch_get([data_range(worksheet) for worksheet in stale])):
+        sheet_rows[worksheet.title] = padded(rows)
+    return sheet_rows
+
+def read_sheet_rows(worksheet, mirror_path=SHEET_MIRROR_PATH, max_age=SHEET_MIRROR_MAX_AGE):
+    """Return one worksheet's rows from the header row onward, see read_sheets_rows."""
+    return read_sheets_rows(worksheet.spreadsheet, [worksheet], mirror_path, max_age)[worksheet.title]
+
 def initialize_sheet(client, sheet_id, sheet_name=SHEET_NAME):
     """Ensure the sheet exists with the correct column headers."""
     logger.info(f"Initializing sheet with ID: {sheet_id}, sheet name: {sheet_name}")
@@ -97,259 +633,349 @@ def initialize_sheet(client, sheet_id, sheet_name=SHEET_NAME):
         # Open the spreadsheet
         spreadsheet = client.open_by_key(sheet_id)
         logger.debug(f"Opened spreadsheet: {spreadsheet.title}")
-        
-        # Check if the inventory sheet exists, create it if it doesn't
-        try:
+    except Exception as e:
+        logger.error(f"Error initializing sheet: {e}")
+        return None
+    return prepare_worksheet(spreadsheet, sheet_name)
+
+def open_worksheet(spreadsheet, sheet_name=SHEET_NAME, existing_worksheets=None):
+    """
+    Return a worksheet of an already opened spreadsheet, creating it if it doesn't exist.
+    Pass the spreadsheet's worksheets keyed on title if they were already listed, to save a metadata request.
+    """
+    try:
+        if existing_worksheets is None:
             worksheet = spreadsheet.worksheet(sheet_name)
-            logger.debug(f"Found existing worksheet: {sheet_name}")
-        except gspread.exceptions.WorksheetNotFound:
-            logger.info(f"Worksheet '{sheet_name}' not found, creating it")
-            # Create with more rows to accommodate the offset
-            worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=HEADER_ROW_OFFSET + 100, cols=len(COLUMN_HEADERS))
+        elif sheet_name in existing_worksheets:
+            worksheet = existing_worksheets[sheet_name]
+        else:
+            raise gspread.exceptions.WorksheetNotFound(sheet_name)
+        logger.debug(f"Found existing worksheet: {sheet_name}")
+    except gspread.exceptions.WorksheetNotFound:
+        logger.info(f"Worksheet '{sheet_name}' not found, creating it")
+        # Create with more rows to accommodate the offset
+        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=HEADER_ROW_OFFSET + 100, cols=len(COLUMN_HEADERS))
+    return worksheet
+
+def write_headers(spreadsheet, worksheet):
+    """Clear a worksheet from the header row down and write the column headers, in a single request."""
+    logger.info(f"Headers at row {HEADER_ROW_OFFSET} of {worksheet.title} missing or don't match, setting up headers")
+    call_with_backoff(spreadsheet.batch_update, {"requests": [
+        {
+            "updateCells": {
+                "range": {"sheetId": worksheet.id, "startRowIndex": HEADER_ROW_OFFSET - 1},
+                "fields": "userEnteredValue"
+            }
+        },
+        {
+            "updateCells": {
+                "start": {"sheetId": worksheet.id, "rowIndex": HEADER_ROW_OFFSET - 1, "columnIndex": 0},
+                "rows": [{"values": [{"userEnteredValue": {"stringValue": header}} for header in COLUMN_HEADERS]}],
+                "fields": "userEnteredValue"
+            }
+        }
+    ]})
+    logger.debug(f"Updated headers at row {HEADER_ROW_OFFSET}")
+
+def prepare_worksheet(spreadsheet, sheet_name=SHEET_NAME, existing_worksheets=None):
+    """
+    Ensure a worksheet of an already opened spreadsheet exists with the correct column headers.
+    Pass the spreadsheet's worksheets keyed on title if they were already listed, to save a metadata request.
+    """
+    try:
+        worksheet = open_worksheet(spreadsheet, sheet_name, existing_worksheets)
         
         # Get the current headers from the offset row
-        try:
-            current_headers = worksheet.row_values(HEADER_ROW_OFFSET)
-            logger.debug(f"Current headers at row {HEADER_ROW_OFFSET}: {current_headers}")
-            
-            # If the headers don't match, set them up
-            if not current_headers or current_headers != COLUMN_HEADERS:
-                logger.info(f"Headers at row {HEADER_ROW_OFFSET} missing or don't match, setting up headers")
-                # Only clear from the header row down
-                cell_range = f"{HEADER_ROW_OFFSET}:{worksheet.row_count}"
-                worksheet.batch_clear([cell_range])
-                # Write headers at the offset row - using proper cell reference for update
-                cell_ref = f"A{HEADER_ROW_OFFSET}"
-                worksheet.update(cell_ref, [COLUMN_HEADERS])
-                logger.debug(f"Updated headers at {cell_ref}")
-        except Exception as e:
-            # Either empty or headers not set up
-            logger.info(f"Setting up headers at row {HEADER_ROW_OFFSET}: {str(e)}")
-            cell_ref = f"A{HEADER_ROW_OFFSET}"
-            worksheet.update(cell_ref, [COLUMN_HEADERS])
-            logger.debug(f"Updated headers at {cell_ref}")
+        current_headers = call_with_backoff(worksheet.row_values, HEADER_ROW_OFFSET)
+        logger.debug(f"Current headers at row {HEADER_ROW_OFFSET}: {current_headers}")
+        
+        if not current_headers or current_headers != COLUMN_HEADERS:
+            write_headers(spreadsheet, worksheet)
             
         logger.info("Sheet initialization complete")
         return worksheet
         
     except Exception as e:
+        if isinstance(e, gspread.exceptions.APIError) and is_auth_error(e):
+            raise
         logger.error(f"Error initializing sheet: {e}")
         return None
 
-@refresh_auth_if_needed
-def upload_inventory_data(data, sheet_name=SHEET_NAME):
+def plan_sheet_upload(worksheet, data, all_values=None):
     """
-    Upload inventory data to Google Sheets.
+    Work out which cells of a worksheet have to change to hold the given inventory data,
+    without writing anything.
     
     Args:
+        worksheet: gspread Worksheet to update
         data: List of dictionaries with keys 'name', 'sku', 'quotes_count', 'jobs_count', 'description'
-        sheet_name: Name of the worksheet to update (default: "Inventory")
-    
+        all_values (list): The worksheet's rows from the header row onward if they were already
+                           read, e.g. by read_sheets_rows (default: read them)
+        
     Returns:
-        Boolean indicating success or failure
+        tuple: (rows from the header row onward as they are now, cell writes keyed on (row, column)),
+               or None if the worksheet's headers are unusable
     """
-    logger.info(f"Starting upload of {len(data)} inventory items to sheet: {sheet_name}")
+    # Every write to this worksheet is queued here and sent in one batch request at the end
+    # Key: (row, column) - both 1-based, Value: value or formula
+    pending_cells = {}
+    
+    # Update cell B1 with the current date and time
+    current_time = datetime.now()
+    # Format as "June 20, 9:06 am" - no year, more readable format
+    friendly_time = current_time.strftime("%B %-d, %-I:%M %p").replace("AM", "am").replace("PM", "pm")
+    pending_cells[(1, 2)] = friendly_time
+    logger.info(f"Queued timestamp for cell B1: Last Updated: {friendly_time}")
+    
+    # Get all current data from the sheet (or our mirror of it), starting at the header row offset.
+    # Formulas are read as formulas (not their results) so we can tell which ones are already correct
+    if all_values is None:
+        all_values = read_sheet_rows(worksheet)
+    
+    if not all_values or len(all_values) < 1:
+        # Sheet is empty or only has headers
+        logger.info("Sheet data area is empty, ensuring headers are present")
+        for col, header in enumerate(COLUMN_HEADERS, start=1):
+            pending_cells[(HEADER_ROW_OFFSET, col)] = header
+        all_values = [COLUMN_HEADERS]
+    
+    headers = all_values[0]
+    logger.debug(f"Headers found: {headers}")
+    
+    # Create indices for important columns
     try:
-        # Get sheet ID from environment
-        sheet_id = os.getenv('GOOGLE_SHEETS_ID')
-        if not sheet_id:
-            logger.error("GOOGLE_SHEETS_ID not found in environment variables")
-            raise ValueError("GOOGLE_SHEETS_ID not found in environment variables")
-        
-        # Initialize client and sheet
-        client = get_google_sheets_client()
-        worksheet = initialize_sheet(client, sheet_id, sheet_name)
-        
-        if not worksheet:
-            logger.error("Failed to initialize worksheet")
-            return False
-        
-        # Update cell B1 with the current date and time - fixed to use 2D array format
-        current_time = datetime.now()
-        # Format as "June 20, 9:06 am" - no year, more readable format
-        friendly_time = current_time.strftime("%B %-d, %-I:%M %p").replace("AM", "am").replace("PM", "pm")
-        worksheet.update('B1', [[f"{friendly_time}"]])  # This requires a 2D array
-        logger.info(f"Updated timestamp in cell B1: Last Updated: {friendly_time}")
-        
-        # Get all current data from the sheet, starting at the header row offset
-        logger.info("Fetching current sheet data")
-        all_values = worksheet.get_all_values()[HEADER_ROW_OFFSET-1:]  # Adjust index to be 0-based
-        
-        if not all_values or len(all_values) < 1:
-            # Sheet is empty or only has headers
-            logger.info("Sheet data area is empty, ensuring headers are present")
-            worksheet.update(f"{HEADER_ROW_OFFSET}:1", [COLUMN_HEADERS])
-            all_values = [COLUMN_HEADERS]
-        
-        headers = all_values[0]
-        logger.debug(f"Headers found: {headers}")
-        
-        # Create indices for important columns
-        try:
-            name_idx = headers.index("Part")
-            sku_idx = headers.index("Part No.")
-            description_idx = headers.index("Description")
-            current_inv_idx = headers.index("Current Inv")
-            quote_idx = headers.index("Quote QTY")
-            job_idx = headers.index("Job QTY")
-            total_allocated_idx = headers.index("Total allocated")
-            available_qty_idx = headers.index("Available QTY")
-            logger.debug(f"Column indices - Name: {name_idx}, SKU: {sku_idx}, Description: {description_idx}, Current Inv: {current_inv_idx}, Quote: {quote_idx}, Job: {job_idx}, Total Allocated: {total_allocated_idx}, Available QTY: {available_qty_idx}")
-        except ValueError as e:
-            logger.error(f"Column header error: {e}")
-            return False
-        
-        # Create a mapping of existing rows for quick lookup
-        # Key: (name, sku), Value: row_index
-        existing_rows = {}
-        logger.info(f"Processing {len(all_values)-1} existing rows from spreadsheet")
-        print(f"Total rows read from sheet: {len(all_values)}")
-        
-        for i, row in enumerate(all_values[1:], start=2):  # Start from 2 as 1 is header
-            if len(row) > max(name_idx, sku_idx):  # Ensure row has enough columns
-                name_val = row[name_idx] if name_idx < len(row) else ""
-                sku_val = row[sku_idx] if sku_idx < len(row) else ""
-                key = (name_val, sku_val)
-                existing_rows[key] = i
-                # Print first few rows to see the data being loaded
-                if i < 7:  # Only print first 5 items for debugging
-                    print(f"Loaded existing item from row {i}: '{name_val}' (SKU: '{sku_val}')")
-        
-        logger.info(f"Found {len(existing_rows)} existing items in spreadsheet")
-        # Debug print the number of empty key entries if any
-        empty_keys = sum(1 for k in existing_rows.keys() if not k[0] and not k[1])
-        if empty_keys > 0:
-            print(f"WARNING: Found {empty_keys} empty entries in existing_rows keys")
+        name_idx = headers.index("Part")
+        sku_idx = headers.index("Part No.")
+        description_idx = headers.index("Description")
+        current_inv_idx = headers.index("Current Inv")
+        quote_idx = headers.index("Quote QTY")
+        job_idx = headers.index("Job QTY")
+        total_allocated_idx = headers.index("Total allocated")
+        available_qty_idx = headers.index("Available QTY")
+        logger.debug(f"Column indices - Name: {name_idx}, SKU: {sku_idx}, Description: {description_idx}, Current Inv: {current_inv_idx}, Quote: {quote_idx}, Job: {job_idx}, Total Allocated: {total_allocated_idx}, Available QTY: {available_qty_idx}")
+    except ValueError as e:
+        logger.error(f"Column header error: {e}")
+        return None
+    
+    # Create a mapping of existing rows for quick lookup
+    # Key: (name, sku), Value: row_index
+    existing_rows = {}
+    logger.info(f"Processing {len(all_values)-1} existing rows from spreadsheet")
+    print(f"Total rows read from sheet: {len(all_values)}")
+    
+    for i, row in enumerate(all_values[1:], start=2):  # Start from 2 as 1 is header
+        if len(row) > max(name_idx, sku_idx):  # Ensure row has enough columns
+            name_val = normalize_cell_value(row[name_idx]) if name_idx < len(row) else ""
+            sku_val = normalize_cell_value(row[sku_idx]) if sku_idx < len(row) else ""
+            key = (name_val, sku_val)
+            existing_rows[key] = i
+            # Print first few rows to see the data being loaded
+            if i < 7:  # Only print first 5 items for debugging
+                print(f"Loaded existing item from row {i}: '{name_val}' (SKU: '{sku_val}')")
+    
+    logger.info(f"Found {len(existing_rows)} existing items in spreadsheet")
+    # Debug print the number of empty key entries if any
+    empty_keys = sum(1 for k in existing_rows.keys() if not k[0] and not k[1])
+    if empty_keys > 0:
+        print(f"WARNING: Found {empty_keys} empty entries in existing_rows keys")
+    
+    # Process each item in our data
+    processed_keys = set()
+    new_rows = []  # List to hold new rows to be added
+    
+    # Prepare and collect all the updates
+    logger.info("Processing inventory data")
+    for item in data:
+        name = item['name']
+        sku = item['sku']
+        quotes_count = item['quotes_count']
+        jobs_count = item['jobs_count']
+        description = item.get('description', '')  # Get description, default to empty string if not present
         
-        # Process each item in our data
-        processed_keys = set()
-        cells_to_update = []  # List to hold all cell updates
-        new_rows = []  # List to hold new rows to be added
+        key = (name, sku)
+        processed_keys.add(key)
         
-        # Prepare and collect all the updates
-        logger.info("Processing inventory data")
-        for item in data:
-            name = item['name']
-            sku = item['sku']
-            quotes_count = item['quotes_count']
-            jobs_count = item['jobs_count']
-            description = item.get('description', '')  # Get description, default to empty string if not present
+        if key in existing_rows:
+            # Update existing row - adjust the row number to account for header offset
+            row_num = existing_rows[key] + HEADER_ROW_OFFSET - 1  # -1 because headers are now at index 0 in all_values
+            current_row = all_values[existing_rows[key] - 1]
+            
+            # Only cells whose value actually changed are written
+            queue_cell_update(pending_cells, current_row, row_num, quote_idx, quotes_count)
+            queue_cell_update(pending_cells, current_row, row_num, job_idx, jobs_count)
+            queue_cell_update(pending_cells, current_row, row_num, description_idx, description)
             
-            key = (name, sku)
-            processed_keys.add(key)
+            logger.debug(f"Checked existing item: {name} (SKU: {sku}) for changes")
+        else:
+            # Prepare new row
+            new_row = [""] * len(headers)
+            new_row[name_idx] = name
+            new_row[sku_idx] = sku
+            new_row[description_idx] = description
+            new_row[quote_idx] = quotes_count
+            new_row[job_idx] = jobs_count
             
-            if key in existing_rows:
-                # Update existing row - adjust the row number to account for header offset
-                row_num = existing_rows[key] + HEADER_ROW_OFFSET - 1  # -1 because headers are now at index 0 in all_values
-                cells_to_update.append(gspread.Cell(row=row_num, col=quote_idx+1, value=quotes_count))
-                cells_to_update.append(gspread.Cell(row=row_num, col=job_idx+1, value=jobs_count))
-                cells_to_update.append(gspread.Cell(row=row_num, col=description_idx+1, value=description))
-                
-                # Add formula for Total allocated column: Quote QTY + Job QTY
-                total_allocated_col_letter = chr(65 + total_allocated_idx)
-                quote_col_letter = chr(65 + quote_idx)
-                job_col_letter = chr(65 + job_idx)
-                total_allocated_formula = f"={quote_col_letter}{row_num}+{job_col_letter}{row_num}"
-                cells_to_update.append(gspread.Cell(row=row_num, col=total_allocated_idx+1, value=total_allocated_formula))
-                
-                # Add formula for Available QTY column: Current Inv - Job QTY
-                available_col_letter = chr(65 + available_qty_idx)
-                current_inv_col_letter = chr(65 + current_inv_idx)
-                available_formula = f"={current_inv_col_letter}{row_num}-{job_col_letter}{row_num}"
-                cells_to_update.append(gspread.Cell(row=row_num, col=available_qty_idx+1, value=available_formula))
-                
-                logger.debug(f"Updating existing item: {name} (SKU: {sku}) with formulas")
+            # For new rows, we'll add the formulas once we know which row they land on
+            new_rows.append(new_row)
+            # Add detailed logging about the new item that wasn't found
+            logger.info(f"Adding new item: {name} (SKU: {sku})")
+            # Print more details to help debug why matching failed
+            print(f"NEW ITEM NOT MATCHED IN SHEET: '{name}' (SKU: '{sku}')")
+            # Print existing keys for comparison 
+            if len(existing_rows) < 10:  # Only print if there aren't too many rows
+                print("Existing keys in sheet:")
+                for existing_key in existing_rows.keys():
+                    print(f"  - '{existing_key[0]}' (SKU: '{existing_key[1]}')")
             else:
-                # Prepare new row
-                new_row = [""] * len(headers)
-                new_row[name_idx] = name
-                new_row[sku_idx] = sku
-                new_row[description_idx] = description
-                new_row[quote_idx] = quotes_count
-                new_row[job_idx] = jobs_count
-                
-                # For new rows, we'll add the formulas during the batch update after they're added
-                new_rows.append(new_row)
-                # Add detailed logging about the new item that wasn't found
-                logger.info(f"Adding new item: {name} (SKU: {sku})")
-                # Print more details to help debug why matching failed
-                print(f"NEW ITEM NOT MATCHED IN SHEET: '{name}' (SKU: '{sku}')")
-                # Print existing keys for comparison 
-                if len(existing_rows) < 10:  # Only print if there aren't too many rows
-                    print("Existing keys in sheet:")
-                    for existing_key in existing_rows.keys():
-                        print(f"  - '{existing_key[0]}' (SKU: '{existing_key[1]}')")
-                else:
-                    print(f"There are {len(existing_rows)} existing items in sheet")
-                print(f"Adding new item: {name} (SKU: {sku})")
-        
-        # Zero out quotes and jobs for rows not in our data - adjust row number
-        logger.info("Processing items no longer in inventory data")
-        for key, row_idx in existing_rows.items():
-            if key not in processed_keys:
-                name_val, sku_val = key
-                row_num = row_idx + HEADER_ROW_OFFSET - 1  # Adjust for header offset
-                cells_to_update.append(gspread.Cell(row=row_num, col=quote_idx+1, value=0))
-                cells_to_update.append(gspread.Cell(row=row_num, col=job_idx+1, value=0))
+                print(f"There are {len(existing_rows)} existing items in sheet")
+            print(f"Adding new item: {name} (SKU: {sku})")
+    
+    # Zero out quotes and jobs for rows not in our data - adjust row number
+    logger.info("Processing items no longer in inventory data")
+    for key, row_idx in existing_rows.items():
+        if key not in processed_keys:
+            name_val, sku_val = key
+            row_num = row_idx + HEADER_ROW_OFFSET - 1  # Adjust for header offset
+            current_row = all_values[row_idx - 1]
+            # Rows that are already zeroed out are left alone
+            zeroed = queue_cell_update(pending_cells, current_row, row_num, quote_idx, 0)
+            zeroed = queue_cell_update(pending_cells, current_row, row_num, job_idx, 0) or zeroed
+            if zeroed:
                 logger.debug(f"Zeroing out item not in current data: {name_val} (SKU: {sku_val})")
+    
+    # Make sure the Total allocated and Available QTY formulas of existing rows are correct.
+    # Per-row formulas are only kept on rows with a part; in array formula mode the first
+    # data row holds the array formulas
+    keyed_rows = set(existing_rows.values())
+    derived_cols = (total_allocated_idx, available_qty_idx)
+    for values_idx in range(1, len(all_values)):
+        row_num = values_idx + HEADER_ROW_OFFSET
+        current_row = all_values[values_idx]
+        if USE_ARRAY_FORMULAS and values_idx > 1:
+            # The arrays spill their results into the rows below, which read back as plain values.
+            # Only per-row formulas left over from before would block them, so only those are cleared
+            for col_idx in derived_cols:
+                if col_idx < len(current_row) and str(current_row[col_idx]).startswith("="):
+                    pending_cells[(row_num, col_idx + 1)] = ""
+            continue
+        if not USE_ARRAY_FORMULAS and values_idx + 1 not in keyed_rows:
+            continue
+        total_allocated_formula, available_formula = derived_formulas(
+            row_num, name_idx, current_inv_idx, quote_idx, job_idx, USE_ARRAY_FORMULAS)
+        queue_cell_update(pending_cells, current_row, row_num, total_allocated_idx, total_allocated_formula)
+        queue_cell_update(pending_cells, current_row, row_num, available_qty_idx, available_formula)
+    
+    # Add all new rows after the existing data
+    if new_rows:
+        logger.info(f"Adding {len(new_rows)} new rows to spreadsheet")
+        # Get the first empty row after the existing data
+        start_row = HEADER_ROW_OFFSET + len(all_values)
+        if len(all_values) <= 1:  # Only headers
+            start_row = HEADER_ROW_OFFSET + 1
         
-        # Add all new rows after the existing data
-        if new_rows:
-            logger.info(f"Adding {len(new_rows)} new rows to spreadsheet")
-            # Get the first empty row after the existing data
-            start_row = HEADER_ROW_OFFSET + len(all_values)
-            if len(all_values) <= 1:  # Only headers
-                start_row = HEADER_ROW_OFFSET + 1
-                
-            # Use update instead of append_rows to specify exact location
-            if new_rows:
-                start_cell = f"A{start_row}"
-                worksheet.update(start_cell, new_rows, value_input_option='USER_ENTERED')
-                logger.debug(f"Added new rows starting at row {start_row}")
-                
-                # Now add formulas for the newly added rows
-                formula_cells = []
-                for i, _ in enumerate(new_rows):
-                    row_num = start_row + i
-                    
-                    # Add formula for Total allocated column: Quote QTY + Job QTY
-                    total_allocated_col_letter = chr(65 + total_allocated_idx)
-                    quote_col_letter = chr(65 + quote_idx)
-                    job_col_letter = chr(65 + job_idx)
-                    total_allocated_formula = f"={quote_col_letter}{row_num}+{job_col_letter}{row_num}"
-                    formula_cells.append(gspread.Cell(row=row_num, col=total_allocated_idx+1, value=total_allocated_formula))
-                    
-                    # Add formula for Available QTY column: Current Inv - Job QTY
-                    available_col_letter = chr(65 + available_qty_idx)
-                    current_inv_col_letter = chr(65 + current_inv_idx)
-                    available_formula = f"={current_inv_col_letter}{row_num}-{job_col_letter}{row_num}"
-                    formula_cells.append(gspread.Cell(row=row_num, col=available_qty_idx+1, value=available_formula))
-                
-                # Update the formula cells
-                if formula_cells:
-                    worksheet.update_cells(formula_cells, value_input_option='USER_ENTERED')
-                    logger.debug(f"Added formulas to {len(formula_cells)//2} new rows")
+        for i, new_row in enumerate(new_rows):
+            row_num = start_row + i
+            
+            new_row[total_allocated_idx], new_row[available_qty_idx] = derived_formulas(
+                row_num, name_idx, current_inv_idx, quote_idx, job_idx, USE_ARRAY_FORMULAS)
+            
+            for col, value in enumerate(new_row, start=1):
+                # Leave the cells the array formulas spill into alone
+                if USE_ARRAY_FORMULAS and col - 1 in derived_cols and value == "":
+                    continue
+                pending_cells[(row_num, col)] = value
+        logger.debug(f"Queued new rows with formulas starting at row {start_row}")
+    
+    return all_values, pending_cells
+
+@refresh_auth_if_needed
+def upload_inventory_targets(targets):
+    """
+    Upload inventory data to several worksheets in one pass.
+    
+    All worksheets share the session's client and a single worksheet metadata fetch, and the
+    changed cells of every worksheet are sent together, so publishing several views costs
+    about the same as publishing one.
+    
+    Args:
+        targets: List of (sheet_name, data) tuples, data as for upload_inventory_data
+    
+    Returns:
+        Boolean indicating success or failure - False if any worksheet could not be updated
+    """
+    for sheet_name, data in targets:
+        logger.info(f"Starting upload of {len(data)} inventory items to sheet: {sheet_name}")
+    planned = []
+    try:
+        # Reuse the client, spreadsheet and worksheet handles of this process
+        worksheets = sheets_session.get_worksheets([sheet_name for sheet_name, _ in targets])
+        spreadsheet = sheets_session.get_spreadsheet()
+        # The headers and rows of every worksheet come back from a single read
+        sheet_rows = read_sheets_rows(spreadsheet, list(worksheets.values()))
+        
+        success = True
+        value_ranges = []
+        formula_ranges = []
+        for sheet_name, data in targets:
+            worksheet = worksheets.get(sheet_name)
+            if not worksheet:
+                logger.error(f"Failed to initialize worksheet: {sheet_name}")
+                success = False
+                continue
+            
+            all_values = sheet_rows[worksheet.title]
+            if all_values and trim_row(all_values[0]) != COLUMN_HEADERS:
+                # Whatever was below the wrong headers is cleared with them
+                write_headers(spreadsheet, worksheet)
+                all_values = [COLUMN_HEADERS]
+            
+            plan = plan_sheet_upload(worksheet, data, all_values)
+            if plan is None:
+                success = False
+                continue
+            all_values, pending_cells = plan
+            planned.append((worksheet, all_values, pending_cells))
+            value_cells, formula_cells = split_formula_cells(pending_cells)
+            value_ranges.extend(build_value_ranges(worksheet.title, value_cells))
+            formula_ranges.extend(build_value_ranges(worksheet.title, formula_cells))
         
-        # Update existing cells in batches to avoid API limits
-        if cells_to_update:
-            logger.info(f"Updating {len(cells_to_update)} cells in batches")
-            batch_size = 100  # Adjustable based on API limits
-            for i in range(0, len(cells_to_update), batch_size):
-                batch = cells_to_update[i:i+batch_size]
-                logger.debug(f"Processing batch {i//batch_size + 1} with {len(batch)} cells")
-                worksheet.update_cells(batch, value_input_option='USER_ENTERED')
-                
-                # Add a small delay to avoid hitting rate limits
-                if i + batch_size < len(cells_to_update):
-                    sleep(0.5)
+        # Send the timestamps, changed cells and new rows of all worksheets together,
+        # and the formulas in a second request since they have to be parsed
+        try:
+            write_value_ranges(spreadsheet, value_ranges, value_input_option=ValueInputOption.raw)
+            write_value_ranges(spreadsheet, formula_ranges)
+        except Exception:
+            # We no longer know what these sheets hold
+            for worksheet, _, _ in planned:
+                save_sheet_mirror(worksheet, None)
+            raise
+        for worksheet, all_values, pending_cells in planned:
+            save_sheet_mirror(worksheet, apply_pending_cells(all_values, pending_cells))
         
-        logger.info("Inventory data upload completed successfully")
-        return True
+        if success:
+            logger.info("Inventory data upload completed successfully")
+        return success
         
     except Exception as e:
+        # Let auth failures reach refresh_auth_if_needed so it can re-authorize and retry
+        if isinstance(e, gspread.exceptions.APIError) and is_auth_error(e):
+            raise
         logger.error(f"Error uploading inventory data: {e}", exc_info=True)
         return False
 
+def upload_inventory_data(data, sheet_name=SHEET_NAME):
+    """
+    Upload inventory data to Google Sheets.
+    
+    Args:
+        data: List of dictionaries with keys 'name', 'sku', 'quotes_count', 'jobs_count', 'description'
+        sheet_name: Name of the worksheet to update (default: "Inventory")
+    
+    Returns:
+        Boolean indicating success or failure
+    """
+    return upload_inventory_targets([(sheet_name, data)])
+
 def main():
     """Example usage with the provided sample data"""
     logger.info("Starting main function with sample data")
@@ -0,0 +1,90 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from queryCost import log_query_cost, is_throttled_response, jobber_throttle
+from config import API_VERSION, JOBBER_MAX_RETRIES, JOBBER_RETRY_BACKOFF, JOBBER_MAX_THROTTLE_RETRIES
+
+GRAPHQL_URL = "https://api.getjobber.com/api/graphql"
+
+class JobberClient:
+    """
+    Shared client for the Jobber GraphQL API.
+    
+    Holds one pooled HTTP session with the auth and API version headers already set, so
+    paginated requests reuse the same keep-alive connection instead of doing a new TLS
+    handshake each time. Transient 429/5xx responses are retried with exponential backoff
+    by the session's adapter, and every request goes through the throttle bucket.
+    """
+    
+    def __init__(self, access_token, max_retries=JOBBER_MAX_RETRIES, backoff_factor=JOBBER_RETRY_BACKOFF,
+                 throttle=jobber_throttle, pool_size=4, max_throttle_retries=JOBBER_MAX_THROTTLE_RETRIES):
+        self.throttle = throttle
+        self.max_throttle_retries = max_throttle_retries
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "X-JOBBER-GRAPHQL-VERSION": API_VERSION
+        })
+        
+        # GraphQL queries are read-only, so it is safe to retry the POSTs
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["POST"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+    
+    def execute(self, payload, query_name, units=1, error_message="Request failed"):
+        """
+        Send a GraphQL request through the throttle bucket.
+        
+        The request is only sent once the bucket can pay for its expected cost, the bucket is
+        resynced from the cost reported in the response, and a throttled response is retried
+        after waiting for the points it was missing, up to max_throttle_retries times.
+        
+        Args:
+            payload (dict): The JSON body with the query and its variables
+            query_name (str): Name of the query, used for cost estimates and logs
+            units (int): What the query cost scales with, e.g. the page size
+            error_message (str): Prefix of the exception raised on a failed request
+            
+        Returns:
+            dict: The JSON response
+            
+        Raises:
+            Exception: If the request failed or was still throttled after max_throttle_retries retries
+        """
+        for attempt in range(self.max_throttle_retries + 1):
+            self.throttle.acquire(self.throttle.estimate(query_name, units))
+            response = self.session.post(GRAPHQL_URL, json=payload)
+            
+            if response.status_code != 200:
+                raise Exception(f"{error_message}: {response.text}")
+            
+            response_data = response.json()
+            self.throttle.update(response_data, query_name, units)
+            # Log query cost information
+            log_query_cost(response_data, query_name)
+            
+            if not is_throttled_response(response_data):
+                return response_data
+            if attempt < self.max_throttle_retries:
+                print(f"{query_name} was throttled, retrying once the API budget has restored")
+        
+        raise Exception(f"{error_message}: still throttled after {self.max_throttle_retries} retries")
+    
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,16 +1,30 @@
 import requests
 import json
-from getterFunctions import fetch_quotes, fetch_jobs, get_job_count, get_quote_count, fetch_jobs_all_data
+import math
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from getterFunctions import (fetch_quotes, fetch_jobs, get_job_count, get_quote_count, fetch_jobs_all_data,
+                             paginate_statuses, fetch_remaining_line_items)
 from queryCost import log_query_cost
-from config import CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN
-from googleSheetsManager import upload_inventory_data
+from jobberClient import JobberClient
+from syncPlanner import plan_sync
+from config import (CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN, SYNC_CACHE_PATH, FORMATTED_SHEET_NAME, UNFORMATTED_SHEET_NAME,
+                    QUANTITY_MODE, QUANTITY_ROUNDING, QUOTE_STATUSES, JOB_STATUSES, CREATED_AFTER,
+                    PAGE_SIZE_INITIAL, SYNC_TIME_BUDGET, SYNC_CHECKPOINT_INTERVAL)
+from googleSheetsManager import upload_inventory_targets
+from syncCache import (load_sync_cache, save_sync_cache, merge_records, empty_sync_cache,
+                       load_checkpoint, save_checkpoint, clear_checkpoints, parse_timestamp,
+                       fetch_updated_after)
 import pprint
 import argparse
 
 def look_at_all_data():
     print("Getting access token...")
     token_data = get_access_token(CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN)
-    access_token = token_data["access_token"]
+    client = JobberClient(token_data["access_token"])
     
     # Initialize variables
     cursor = None
@@ -26,7 +40,7 @@ def look_at_all_data():
         print(f"Fetching batch {i+1}/10...")
         
         # Fetch jobs using the cursor from previous batch
-        page_data = fetch_jobs_all_data(access_token, after=cursor, limit=5)
+        page_data = fetch_jobs_all_data(client, after=cursor, limit=5)
         
         # Save this batch data to file
         with open("job_results.txt", "a") as f:
@@ -92,169 +106,356 @@ def get_access_token(client_id, client_secret, refresh_token):
     else:
         raise Exception(f"Failed to get access token: {response.text}")
 
+# Where an item's data can come from, in the order they are reported.
+# Each one is a bit of InventoryItem.sources
+SOURCE_LOCATIONS = (
+    'lineItem.category',
+    'linkedProductOrService.category',
+    'lineItem.name (category unknown)',
+    'lineItem.description',
+    'lineItem.name',
+    'linkedProductOrService.name',
+    'linkedProductOrService.description',
+    'CSV Import'
+)
+SOURCE_BITS = {location: 1 << bit for bit, location in enumerate(SOURCE_LOCATIONS)}
+
+def intern_text(value):
+    """Intern a string that repeats across many items (names, SKUs, categories) so they share one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
+
 class InventoryItem:
-    def __init__(self, name=None, sku=None, description=None, source_location=None, category=None):
-        self.name = name
-        self.sku = sku
+    """
+    One inventory line of a quote, job or CSV row.
+    
+    We keep one item per product line item and view, so items are slotted to skip the
+    per-instance __dict__, the repeating strings are interned and the data sources are kept
+    as a bitmask of SOURCE_LOCATIONS rather than as a joined string.
+    """
+    __slots__ = ('name', 'sku', 'description', 'category', 'quantity', 'sources')
+    
+    def __init__(self, name=None, sku=None, description=None, source_location=None, category=None, quantity=1,
+                 sources=0):
+        self.name = intern_text(name)
+        self.sku = intern_text(sku)
         self.description = description
-        self.source_location = source_location
-        self.category = category
+        self.category = intern_text(category)
+        self.quantity = quantity
+        self.sources = sources
+        if source_location:
+            self.source_location = source_location
+    
+    @property
+    def source_location(self):
+        """Where the data was found, as a comma separated list of SOURCE_LOCATIONS."""
+        return ', '.join(location for location in SOURCE_LOCATIONS if self.sources & SOURCE_BITS[location])
+    
+    @source_location.setter
+    def source_location(self, value):
+        locations = value.split(', ') if isinstance(value, str) else value
+        self.sources = 0
+        for location in locations or ():
+            self.sources |= SOURCE_BITS[location]
     
     def __str__(self):
         return f"Name: {self.name}, SKU: {self.sku}, Description: {self.description}"
 
-def is_name_sku(name):
+class SkuClassifier:
     """
-    Check if the entire name appears to be a SKU.
-    Returns True if the name is a SKU, False otherwise.
+    Decides whether a product name is really a SKU.
     
     SKUs can include:
     - All caps with numbers (and optional dashes)
     - At least 3 characters
     - Not common words
-    """
-    if not name:
-        return False
     
-    # Look for common SKU patterns
-    import re
+    The pattern is compiled once and the answers are memoized per name, since the same
+    product names come up again on thousands of line items.
+    """
     
     # Check if the entire name is a potential SKU (all caps, numbers, and dashes)
-    # Modified to allow dashes in SKUs
-    if re.match(r'^[A-Z0-9-]+$', name) and len(name) >= 3:
-        # Avoid matching common words that might appear in all caps
-        common_words = ['AND', 'THE', 'FOR', 'WITH', 'FROM', 'UNIT', 'HAND', 'WIDE', 'LONG', 'HIGH', 'TALL']
-        if name not in common_words:
-            return True
+    SKU_PATTERN = re.compile(r'^[A-Z0-9-]+$')
+    # Common words that might appear in all caps
+    COMMON_WORDS = frozenset(['AND', 'THE', 'FOR', 'WITH', 'FROM', 'UNIT', 'HAND', 'WIDE', 'LONG', 'HIGH', 'TALL'])
     
-    return False
+    def __init__(self, cache_size=4096):
+        self.is_sku = lru_cache(maxsize=cache_size)(self._classify)
+    
+    def _classify(self, name):
+        return bool(self.SKU_PATTERN.match(name)) and len(name) >= 3 and name not in self.COMMON_WORDS
+    
+    def __call__(self, name):
+        """Return True if the entire name is a SKU, False otherwise."""
+        if not name:
+            return False
+        return self.is_sku(name)
+    
+    def classify_many(self, names):
+        """
+        Classify a batch of names.
+        
+        Args:
+            names (iterable): Product names
+            
+        Returns:
+            list: True/False for each name, in order
+        """
+        return [self(name) for name in names]
 
-def process_quote_inventory(quote, formatData=True):
+# Shared by every extraction in this process
+sku_classifier = SkuClassifier()
+
+def is_name_sku(name):
     """
-    Process a single quote and extract only PRODUCT inventory items with their details.
+    Check if the entire name appears to be a SKU.
+    Returns True if the name is a SKU, False otherwise.
+    See SkuClassifier for the rules.
+    """
+    return sku_classifier(name)
+
+def parse_quantity(value):
+    """
+    Parse a line item quantity into a number.
+    
+    Jobber returns quantities as floats, but older records and CSV exports can hold strings
+    such as "2" or "1,000". A missing or unreadable quantity counts as 1 so the line item is
+    still counted once.
     
     Args:
-        quote (dict): Quote data from the Jobber API
-        formatData (bool): Whether to apply SKU detection and rearrangement logic (default: True)
+        value: The raw quantity
         
     Returns:
-        list: List of InventoryItem objects
+        float: The quantity
+    """
+    if value is None or isinstance(value, bool):
+        return 1.0
+    if isinstance(value, (int, float)):
+        quantity = float(value)
+    else:
+        try:
+            quantity = float(str(value).replace(',', '').strip())
+        except ValueError:
+            return 1.0
+    return quantity if math.isfinite(quantity) else 1.0
+
+QUANTITY_ROUNDINGS = ("half_up", "ceil", "floor", "none")
+
+def round_quantity(quantity, rounding=QUANTITY_ROUNDING):
     """
-    inventory_items = []
+    Round a summed quantity with the configured rounding policy.
     
-    # Check if the quote has line items
-    if 'lineItems' not in quote or 'nodes' not in quote['lineItems']:
-        return inventory_items
+    Args:
+        quantity (float): The summed quantity
+        rounding (str): "half_up", "ceil", "floor" or "none"
+        
+    Returns:
+        int or float: The rounded quantity - whole numbers are returned as int
+    """
+    # Drop float noise from summing (e.g. 0.1 + 0.2) before rounding
+    quantity = round(quantity, 6)
+    if rounding == "ceil":
+        quantity = math.ceil(quantity)
+    elif rounding == "floor":
+        quantity = math.floor(quantity)
+    elif rounding == "half_up":
+        quantity = math.floor(quantity + 0.5)
+    elif rounding != "none":
+        raise ValueError(f"Unknown quantity rounding policy: {rounding}")
+    return int(quantity) if float(quantity).is_integer() else quantity
+
+def build_inventory_items(line_item, category, sources, formatted=True, unformatted=True):
+    """
+    Build the formatted and unformatted InventoryItem for a single product line item in one pass.
     
-    # Add logging to track the quote
-    quote_id = quote.get('id', 'unknown')
+    Both views share the category, description and data sources of the line item and only
+    differ in how the name and SKU are worked out, so those are resolved side by side
+    instead of walking the line item once per view.
     
-    for line_item in quote['lineItems']['nodes']:
-        # Track where we found the data
-        source_locations = []
-        
-        # Initialize an inventory item
-        item = InventoryItem()
-        
-        # Check if this is a PRODUCT (either directly or in linked item)
-        is_product = False
-        
-        # Log the line item for debugging
-        line_item_name = line_item.get('name', 'No name')
-        
-        # In quotes, we don't have a direct category field on line items
-        # We need to check linkedProductOrService instead
-        if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
-            linked_item = line_item['linkedProductOrService']
-                            
-            if 'category' in linked_item and linked_item['category'] == 'PRODUCT':
-                is_product = True
-                item.category = 'PRODUCT'
-                source_locations.append('linkedProductOrService.category')
-        
-        # MODIFIED: We now only consider items with UNKNOWN category if they have keywords 
-        # that suggest they're products, not services
-        if not is_product and 'name' in line_item and line_item['name']:
-            # Check if the name suggests this is a service
-            service_keywords = ['installation', 'labor', 'service', 'removal', 'maintenance', 
-                               'repair', 'visit', 'rental', 'consultation', 'delivery']
-            
-            name_lower = line_item['name'].lower()
-            is_likely_service = any(keyword in name_lower for keyword in service_keywords)
-            
-            if is_likely_service:
-                continue
-            
-            # If we get here, we'll include it with UNKNOWN category
-            item.category = 'UNKNOWN'
-            source_locations.append('lineItem.name (category unknown)')
-            is_product = True
+    Args:
+        line_item (dict): Line item data from the Jobber API
+        category (str): Category already determined for the line item
+        sources (int): SOURCE_BITS of where the category was found
+        formatted (bool): Whether to build the item with SKU detection and rearrangement applied
+        unformatted (bool): Whether to build the item with the names kept as they are
         
-        # Skip if this doesn't seem to be a product
-        if not is_product:
-            continue
-
-        if 'description' in line_item and line_item['description']:
-            item.description = line_item['description']
-            source_locations.append('lineItem.description')
+    Returns:
+        tuple: (formatted item, unformatted item) - each is None if not requested or it has no name
+    """
+    description = line_item.get('description') or None
+    if description:
+        sources |= SOURCE_BITS['lineItem.description']
+    
+    line_item_name = line_item.get('name') or None
+    if line_item_name:
+        sources |= SOURCE_BITS['lineItem.name']
+    
+    linked_item = line_item.get('linkedProductOrService') or {}
+    linked_name = linked_item.get('name') or None
+    
+    formatted_item = None
+    if formatted:
+        formatted_sources = sources
+        name = line_item_name
+        sku = None
+        if line_item_name and is_name_sku(line_item_name):
+            # If name is a SKU, use it as the SKU and the description (if any) as the name
+            sku = line_item_name
+            name = description or line_item_name
         
-        # Extract data from direct line item
-        if 'name' in line_item and line_item['name']:
-            source_locations.append('lineItem.name')
-            
-            # Only apply SKU detection if formatData is True
-            if formatData and is_name_sku(line_item['name']):
-                # If name is a SKU, set sku to name
-                item.sku = line_item['name']
-                # If we have a description, use it as the name
-                if item.description:
-                    item.name = item.description
-                else:
-                    # Otherwise keep the name as is
-                    item.name = line_item['name']
+        # If we didn't get a name from the line item, or the linked item has a different name
+        if linked_name and (not name or linked_name != name):
+            formatted_sources |= SOURCE_BITS['linkedProductOrService.name']
+            if not sku and is_name_sku(linked_name):
+                sku = linked_name
+                name = description or linked_name
             else:
-                # If formatData is False or name is not a SKU, keep name as is
-                item.name = line_item['name']
-                # Only set sku to None if formatData is True (otherwise leave it unset)
-                if formatData:
-                    item.sku = None
-            
-        # If there's a linked product/service, check it for more info
-        if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
-            linked_item = line_item['linkedProductOrService']  
-            # If we didn't get a name from the line item, or the linked item has a different name
-            if ('name' in linked_item and linked_item['name'] and 
-                (not item.name or linked_item['name'] != item.name)):
-                source_locations.append('linkedProductOrService.name')
-                
-                # Only apply SKU detection if formatData is True
-                if formatData and not item.sku and is_name_sku(linked_item['name']):
-                    # If linked name is a SKU, set sku to linked name
-                    item.sku = linked_item['name']
-                    # If we have a description, use it as the name
-                    if item.description:
-                        item.name = item.description
-                    else:
-                        # Otherwise keep the linked name as is
-                        item.name = linked_item['name']
-                else:
-                    # If formatData is False or linked name is not a SKU, keep it as name
-                    item.name = linked_item['name']
-            
-            # If we didn't get a description, or the linked item has additional description
-            if ('description' in linked_item and linked_item['description'] and 
-                (item.description is None)):
-                item.description = linked_item['description']
-                source_locations.append('linkedProductOrService.description')
+                name = linked_name
         
-        # Record where we found the data
-        item.source_location = ', '.join(source_locations)
+        if name:
+            formatted_item = InventoryItem(name=name, sku=sku, description=description,
+                                           category=category, sources=formatted_sources)
+    
+    unformatted_item = None
+    if unformatted:
+        unformatted_sources = sources
+        name = line_item_name
+        if linked_name and (not name or linked_name != name):
+            unformatted_sources |= SOURCE_BITS['linkedProductOrService.name']
+            name = linked_name
         
-        # Add to our list if we have at least a name
-        if item.name:
-            inventory_items.append(item)
+        if name:
+            unformatted_item = InventoryItem(name=name, description=description,
+                                             category=category, sources=unformatted_sources)
+    
+    # If we didn't get a description, fall back to the one on the linked item
+    linked_description = linked_item.get('description')
+    if not description and linked_description:
+        for item in (formatted_item, unformatted_item):
+            if item:
+                item.description = linked_description
+                item.sources |= SOURCE_BITS['linkedProductOrService.description']
+    
+    # Record how many units the line item is for
+    quantity = parse_quantity(line_item.get('quantity'))
+    for item in (formatted_item, unformatted_item):
+        if item:
+            item.quantity = quantity
     
-    return inventory_items
+    return formatted_item, unformatted_item
+
+# Line items whose name mentions one of these are services, not inventory
+SERVICE_KEYWORDS = ('installation', 'labor', 'service', 'removal', 'maintenance',
+                    'repair', 'visit', 'rental', 'consultation', 'delivery')
+SERVICE_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in SERVICE_KEYWORDS))
+
+# How each record type tells products apart from everything else:
+# - product_categories: where a PRODUCT category can be found ('lineItem' or
+#   'linkedProductOrService'), each found one is recorded as a data source
+# - unknown_products: whether line items without a PRODUCT category still count (as category
+#   UNKNOWN) when they have a name that doesn't look like a service. Quote line items
+#   have no category of their own, so quotes rely on this.
+EXTRACTION_RULES = {
+    "quotes": {
+        "product_categories": ('linkedProductOrService',),
+        "unknown_products": True
+    },
+    "jobs": {
+        "product_categories": ('lineItem', 'linkedProductOrService'),
+        "unknown_products": False
+    }
+}
+
+def extract_inventory(record, rules, formatted=True, unformatted=True):
+    """
+    Extract the PRODUCT inventory items of a quote or job, building the formatted and
+    unformatted views together so each line item is only walked once.
+    
+    Line items are classified from the record type's rules before anything is allocated
+    for them, so services and other non-products cost no more than a couple of lookups.
+    
+    Args:
+        record (dict): Quote or job data from the Jobber API
+        rules (dict): The record type's entry of EXTRACTION_RULES
+        formatted (bool): Whether to extract items with SKU detection and rearrangement applied
+        unformatted (bool): Whether to extract items with the names kept as they are
+        
+    Returns:
+        tuple: (formatted, unformatted) lists of InventoryItem objects - empty if not requested
+    """
+    formatted_items = []
+    unformatted_items = []
+    
+    line_items = (record.get('lineItems') or {}).get('nodes')
+    if not line_items:
+        return formatted_items, unformatted_items
+    
+    check_line_item = 'lineItem' in rules["product_categories"]
+    check_linked_item = 'linkedProductOrService' in rules["product_categories"]
+    unknown_products = rules["unknown_products"]
+    
+    for line_item in line_items:
+        linked_item = line_item.get('linkedProductOrService')
+        line_item_product = check_line_item and line_item.get('category') == 'PRODUCT'
+        linked_product = check_linked_item and linked_item is not None and linked_item.get('category') == 'PRODUCT'
+        
+        if line_item_product or linked_product:
+            category = 'PRODUCT'
+        elif unknown_products and line_item.get('name') and not SERVICE_PATTERN.search(line_item['name'].lower()):
+            category = 'UNKNOWN'
+        else:
+            # Not a product - skip it before building anything
+            continue
+        
+        # Track where we found the data
+        if category == 'UNKNOWN':
+            sources = SOURCE_BITS['lineItem.name (category unknown)']
+        else:
+            sources = ((SOURCE_BITS['lineItem.category'] if line_item_product else 0) |
+                       (SOURCE_BITS['linkedProductOrService.category'] if linked_product else 0))
+        
+        formatted_item, unformatted_item = build_inventory_items(
+            line_item, category, sources, formatted, unformatted)
+        
+        # Add to our lists if we have at least a name
+        if formatted_item:
+            formatted_items.append(formatted_item)
+        if unformatted_item:
+            unformatted_items.append(unformatted_item)
+    
+    return formatted_items, unformatted_items
+
+def extract_quote_inventory(quote, formatted=True, unformatted=True):
+    """
+    Process a single quote and extract only PRODUCT inventory items, see extract_inventory.
+    
+    Returns:
+        tuple: (formatted, unformatted) lists of InventoryItem objects - empty if not requested
+    """
+    return extract_inventory(quote, EXTRACTION_RULES["quotes"], formatted, unformatted)
+
+def process_quote_inventory(quote, formatData=True):
+    """
+    Process a single quote and extract only PRODUCT inventory items with their details.
+    
+    Args:
+        quote (dict): Quote data from the Jobber API
+        formatData (bool): Whether to apply SKU detection and rearrangement logic (default: True)
+        
+    Returns:
+        list: List of InventoryItem objects
+    """
+    formatted_items, unformatted_items = extract_quote_inventory(
+        quote, formatted=formatData, unformatted=not formatData)
+    return formatted_items if formatData else unformatted_items
+
+def extract_job_inventory(job, formatted=True, unformatted=True):
+    """
+    Process a single job and extract only PRODUCT inventory items, see extract_inventory.
+    
+    Returns:
+        tuple: (formatted, unformatted) lists of InventoryItem objects - empty if not requested
+    """
+    return extract_inventory(job, EXTRACTION_RULES["jobs"], formatted, unformatted)
 
 def process_job_inventory(job, formatData=True):
     """
@@ -267,99 +468,141 @@ def process_job_inventory(job, formatData=True):
     Returns:
         list: List of InventoryItem objects
     """
-    inventory_items = []
+    formatted_items, unformatted_items = extract_job_inventory(
+        job, formatted=formatData, unformatted=not formatData)
+    return formatted_items if formatData else unformatted_items
+
+def product_sort_key(product):
+    """
+    Order products with a SKU first, alphabetically by SKU, then the rest alphabetically by name.
+    Ties (the same SKU under several names, or differing only in case) are broken on the full
+    key, so the order doesn't depend on the order the products were found in.
+    """
+    if product['sku']:
+        return (0, product['sku'].lower(), product['sku'], product['name'])
+    return (1, product['name'].lower(), product['name'], "")
+
+class InventoryAggregator:
+    """
+    Running inventory counts, kept per source (quotes, jobs, CSV, ...).
     
-    # Check if the job has line items
-    if 'lineItems' not in job or 'nodes' not in job['lineItems']:
-        return inventory_items
+    Every source counts its items by (name, SKU, description), with a missing value as "",
+    like aggregate_inventory_by_name always has. The combined inventory groups them into
+    products keyed on (SKU, name), the key the sheet uses. Items can be added a batch at a
+    time as they are extracted, from several threads, so the raw records and the InventoryItem
+    objects never need to be kept around, and nothing is sorted until the results are emitted.
     
-    for line_item in job['lineItems']['nodes']:
-        # Track where we found the data
-        source_locations = []
-        
-        # Initialize an inventory item
-        item = InventoryItem()
+    In "quantity" mode the line item quantities are summed instead of counting the
+    line items, and the totals are rounded with the rounding policy when they are emitted.
+    """
+    
+    def __init__(self, quantity_mode=QUANTITY_MODE, rounding=QUANTITY_ROUNDING):
+        if quantity_mode not in ("count", "quantity"):
+            raise ValueError(f"Unknown quantity mode: {quantity_mode}")
+        # Checked up front, so a bad policy fails before the sync is paid for, not when the totals are emitted
+        if rounding not in QUANTITY_ROUNDINGS:
+            raise ValueError(f"Unknown quantity rounding policy: {rounding}")
+        # Key: (source, sku, name, description), Value: count, in the order first seen
+        self.counts = {}
+        self.weighted = quantity_mode == "quantity"
+        self.rounding = rounding
+        self.lock = threading.Lock()
+    
+    def add(self, inventory_items, source="count"):
+        """Count a batch of InventoryItem objects found in the given source."""
+        counts = self.counts
+        weighted = self.weighted
+        with self.lock:
+            for item in inventory_items:
+                key = (source, item.sku or "", item.name or "", item.description or "")
+                # Increment the count (or quantity) for this name-SKU-description combination
+                counts[key] = counts.get(key, 0) + (item.quantity if weighted else 1)
+    
+    def dump(self, source="count"):
+        """Return the running counts of a source as JSON-serialisable rows of [name, sku, description, count]."""
+        with self.lock:
+            return [[name, sku, description, count]
+                    for (count_source, sku, name, description), count in self.counts.items()
+                    if count_source == source]
+    
+    def load(self, rows, source="count"):
+        """Restore running counts of a source saved with dump()."""
+        with self.lock:
+            for name, sku, description, count in rows:
+                self.counts[(source, sku, name, description)] = count
+    
+    def total(self, count):
+        """Emitted count, rounded in quantity mode."""
+        return round_quantity(count, self.rounding) if self.weighted else count
+    
+    def results(self, source="count"):
+        """
+        Returns:
+            list: List of dictionaries containing name, SKU, description and count of every
+                  combination found in a source, sorted by count in descending order
+        """
+        with self.lock:
+            counts = [(key, count) for key, count in self.counts.items() if key[0] == source]
+        result = []
+        for (_, sku, name, description), count in counts:
+            result.append({
+                "name": name,
+                "sku": sku,
+                "count": self.total(count),
+                "description": description
+            })
         
-        # Check if this is a PRODUCT (either directly or in linked item)
-        is_product = False
+        # Sort by count in descending order
+        result.sort(key=lambda x: x["count"], reverse=True)
         
-        if 'category' in line_item and line_item['category'] == 'PRODUCT':
-            is_product = True
-            item.category = 'PRODUCT'
-            source_locations.append('lineItem.category')
+        return result
+    
+    @staticmethod
+    def description(sources, priority=()):
+        """
+        Pick the description to show for a product: the most common one in the first source
+        of priority the product was found in (or any source), the first one seen on a tie.
+        """
+        for source in list(priority) + [source for source in sources if source not in priority]:
+            descriptions = sources.get(source)
+            if descriptions:
+                return max(descriptions, key=descriptions.get)
+        return ""
+    
+    def combined(self, sources=("quotes", "jobs"), description_priority=("jobs", "quotes")):
+        """
+        Emit the combined inventory with a separate count per source.
         
-        # Check linked product/service category
-        if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
-            linked_item = line_item['linkedProductOrService']
-            if 'category' in linked_item and linked_item['category'] == 'PRODUCT':
-                is_product = True
-                item.category = 'PRODUCT'
-                source_locations.append('linkedProductOrService.category')
+        A product's count in a source is the sum over all the descriptions it was found with,
+        and it is shown with its most common description.
         
-        # Skip if this is not a product
-        if not is_product:
-            continue
-
-        if 'description' in line_item and line_item['description']:
-            item.description = line_item['description']
-            source_locations.append('lineItem.description')
-        
-        # Extract data from direct line item
-        if 'name' in line_item and line_item['name']:
-            source_locations.append('lineItem.name')
-            # Only apply SKU detection if formatData is True
-            if formatData and is_name_sku(line_item['name']):
-                # If name is a SKU, set sku to name
-                item.sku = line_item['name']
-                # If we have a description, use it as the name
-                if item.description:
-                    item.name = item.description
-                else:
-                    # Otherwise keep the name as is
-                    item.name = line_item['name']
-            else:
-                # If formatData is False or name is not a SKU, keep name as is
-                item.name = line_item['name']
-                # Only set sku to None if formatData is True
-                if formatData:
-                    item.sku = None
+        Args:
+            sources (tuple): Sources to report a <source>_count for, 0 where a product wasn't found
+            description_priority (tuple): Sources whose descriptions are preferred, in order
             
-        # If there's a linked product/service, check it for more info
-        if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
-            linked_item = line_item['linkedProductOrService']
-            
-            # If we didn't get a name from the line item, or the linked item has a different name
-            if ('name' in linked_item and linked_item['name'] and 
-                (not item.name or linked_item['name'] != item.name)):
-                source_locations.append('linkedProductOrService.name')
-                # Only apply SKU detection if formatData is True
-                if formatData and not item.sku and is_name_sku(linked_item['name']):
-                    # If linked name is a SKU, set sku to linked name
-                    item.sku = linked_item['name']
-                    # If we have a description, use it as the name
-                    if item.description:
-                        item.name = item.description
-                    else:
-                        # Otherwise keep the linked name as is
-                        item.name = linked_item['name']
-                else:
-                    # If formatData is False or linked name is not a SKU, keep it as name
-                    item.name = linked_item['name']
-            
-            # If we didn't get a description, or the linked item has additional description
-            if ('description' in linked_item and linked_item['description'] and 
-                (item.description is None)):
-                item.description = linked_item['description']
-                source_locations.append('linkedProductOrService.description')
+        Returns:
+            list: Dictionaries with sku, name, description and the counts, first the items with
+                  a SKU sorted by SKU, then the rest sorted by name
+        """
+        # Key: (sku, name), Value: {source: {description: count}}
+        products = {}
+        with self.lock:
+            for (source, sku, name, description), count in self.counts.items():
+                products.setdefault((sku, name), {}).setdefault(source, {})[description] = count
         
-        # Record where we found the data
-        item.source_location = ', '.join(source_locations)
+        result = []
+        for (sku, name), product_sources in products.items():
+            product = {
+                'sku': sku,
+                'name': name,
+                'description': self.description(product_sources, description_priority)
+            }
+            for source in sources:
+                product[f'{source}_count'] = self.total(sum(product_sources.get(source, {}).values()))
+            result.append(product)
         
-        # Add to our list if we have at least a name
-        if item.name:
-            inventory_items.append(item)
-    
-    return inventory_items
+        result.sort(key=product_sort_key)
+        return result
 
 def aggregate_inventory_by_name(inventory_items):
     """
@@ -374,34 +617,9 @@ def aggregate_inventory_by_name(inventory_items):
     if not inventory_items:
         return []
     
-    # Create a dictionary to count occurrences of each name-SKU combination
-    item_counts = {}
-    
-    for item in inventory_items:
-        # Create a composite key using both name and SKU
-        # If SKU is None, use an empty string to avoid None-related issues
-        name = item.name if item.name else ""
-        sku = item.sku if item.sku else ""
-        description = item.description if item.description else ""
-        key = (name, sku, description)
-        
-        # Increment the count for this name-SKU combination
-        item_counts[key] = item_counts.get(key, 0) + 1
-    
-    # Convert to a list of dictionaries with name, SKU, and count
-    result = []
-    for (name, sku, description), count in item_counts.items():
-        result.append({
-            "name": name,
-            "sku": sku,
-            "count": count,
-            "description": description
-        })
-    
-    # Sort by count in descending order
-    result.sort(key=lambda x: x["count"], reverse=True)
-    
-    return result
+    aggregator = InventoryAggregator()
+    aggregator.add(inventory_items)
+    return aggregator.results()
 
 def print_inventory_items(inventory_items):
     
@@ -465,289 +683,424 @@ def print_inventory_items(inventory_items):
     else:
         print("No inventory items found in the jobs.")
 
-def get_all_jobs(access_token):
-            # Initialize variables for pagination
-        cursor = None
-        has_next_page = True
-        all_jobs = []
-        batch_count = 0
+def iter_job_pages(client, updated_after=None, after=None, server_filters=True, page_size=PAGE_SIZE_INITIAL):
+    """
+    Fetch jobs from the Jobber API page by page.
+    
+    Args:
+        client (JobberClient): The shared Jobber API client
+        updated_after (str): Only fetch jobs updated after this ISO 8601 timestamp (default: all jobs)
+        after (list): Cursor to resume after, as yielded (default: first page)
+        server_filters (bool): Whether to only fetch jobs in the configured statuses and date window
+        page_size (int): Size of the first page, later pages are sized to the API budget
         
-        # Import time for sleep functionality
-        import time
+    Yields:
+        tuple: (raw job nodes of the page, cursor of the page), as soon as the page arrives
+    """
+    total_jobs = 0
+    
+    # Page sizes and pauses between pages are driven by the API throttle budget
+    pages = paginate_statuses(fetch_jobs, client, "jobs", JOB_STATUSES if server_filters else None, after=after,
+                              limit=page_size, updated_after=updated_after,
+                              created_after=CREATED_AFTER if server_filters else None)
+    for batch_count, (batch_jobs, end_cursor) in enumerate(pages, start=1):
+        total_jobs += len(batch_jobs)
+        print(f"[jobs] Retrieved {len(batch_jobs)} jobs in batch {batch_count}, "
+              f"{total_jobs} fetched so far")
+        # Large jobs only come with the first few line items, fetch the rest of them
+        extra_line_items = fetch_remaining_line_items(client, "jobs", batch_jobs)
+        if extra_line_items:
+            print(f"[jobs] Fetched {extra_line_items} more line items for large jobs")
+        yield batch_jobs, end_cursor
+    
+    print("[jobs] No more jobs to fetch.")
+
+def get_all_jobs(client, sync_cache=None, formatted=True, unformatted=True, resume=True,
+                 page_size=PAGE_SIZE_INITIAL, inventories=None):
+    """
+    Fetch all jobs from the Jobber API and aggregate their inventory information.
+    
+    Args:
+        client (JobberClient): The shared Jobber API client
+        sync_cache (dict): Optional sync cache. When given, only jobs changed since the
+                           cached watermark are fetched and merged into the cached jobs. The
+                           cached jobs are fetched again if some were deleted in Jobber.
+        formatted (bool): Whether to aggregate the formatted view (default: True)
+        unformatted (bool): Whether to aggregate the unformatted view (default: True)
+        resume (bool): Whether to resume from the checkpoint of an interrupted run (default: True)
+        page_size (int): Size of the first page (default: PAGE_SIZE_INITIAL)
+        inventories (tuple): (formatted, unformatted) InventoryAggregator to count into,
+                             e.g. shared with the quotes (default: new ones)
         
-        # Loop until we've fetched all jobs
-        while has_next_page:
-        # for _ in range (5):
-            batch_count += 1
-            print(f"\nFetching batch {batch_count} of jobs...")
-            
-            # Fetch 5 jobs at a time using cursor-based pagination
-            jobs_data = fetch_jobs(access_token, after=cursor, limit=5)
-            
-            # Extract jobs from this batch
-            batch_jobs = jobs_data["data"]["jobs"]["nodes"]
-            all_jobs.extend(batch_jobs)
-            
-            # Get pagination info for next batch
-            pagination_info = jobs_data["data"]["jobs"]["pageInfo"]
-            cursor = pagination_info["endCursor"]
-            has_next_page = pagination_info["hasNextPage"]
-            
-            print(f"Retrieved {len(batch_jobs)} jobs in this batch")
-            print(f"Total jobs fetched so far: {len(all_jobs)}")
-            
-            if has_next_page:
-                print("Sleeping for 1 second before next batch...")
-                time.sleep(1)
-            else:
-                print("No more jobs to fetch.")
-        
-        # Process all jobs to extract inventory information
-        formatted_inventory_items = []
-        unformatted_inventory_items = []
-        for job in all_jobs:
-            formatted_job_inventory = process_job_inventory(job, formatData=True)
-            unformatted_job_inventory = process_job_inventory(job, formatData=False)
-            
-            formatted_inventory_items.extend(formatted_job_inventory)
-            unformatted_inventory_items.extend(unformatted_job_inventory)
+    Returns:
+        tuple: (formatted, unformatted) InventoryAggregator with the jobs counted under source 'jobs'.
+               A view that was not requested is None.
+    """
+    return collect_inventory(client, "jobs", iter_job_pages, extract_job_inventory,
+                             sync_cache, formatted, unformatted, resume, page_size, inventories,
+                             count_records=get_job_count)
+
+def iter_quote_pages(client, updated_after=None, after=None, server_filters=True, page_size=PAGE_SIZE_INITIAL):
+    """
+    Fetch quotes from the Jobber API page by page.
+    
+    Args:
+        client (JobberClient): The shared Jobber API client
+        updated_after (str): Only fetch quotes updated after this ISO 8601 timestamp (default: all quotes)
+        after (list): Cursor to resume after, as yielded (default: first page)
+        server_filters (bool): Whether to only fetch quotes in the configured statuses and date window
+        page_size (int): Size of the first page, later pages are sized to the API budget
         
-        return formatted_inventory_items, unformatted_inventory_items
+    Yields:
+        tuple: (raw quote nodes of the page, cursor of the page), as soon as the page arrives
+    """
+    total_quotes = 0
+    
+    # Page sizes and pauses between pages are driven by the API throttle budget
+    pages = paginate_statuses(fetch_quotes, client, "quotes", QUOTE_STATUSES if server_filters else None, after=after,
+                              limit=page_size, updated_after=updated_after,
+                              created_after=CREATED_AFTER if server_filters else None)
+    for batch_count, (batch_quotes, end_cursor) in enumerate(pages, start=1):
+        total_quotes += len(batch_quotes)
+        print(f"[quotes] Retrieved {len(batch_quotes)} quotes in batch {batch_count}, "
+              f"{total_quotes} fetched so far")
+        # Large quotes only come with the first few line items, fetch the rest of them
+        extra_line_items = fetch_remaining_line_items(client, "quotes", batch_quotes)
+        if extra_line_items:
+            print(f"[quotes] Fetched {extra_line_items} more line items for large quotes")
+        yield batch_quotes, end_cursor
+    
+    print("[quotes] No more quotes to fetch.")
 
-def get_all_quotes(access_token):
+def get_all_quotes(client, sync_cache=None, formatted=True, unformatted=True, resume=True,
+                   page_size=PAGE_SIZE_INITIAL, inventories=None):
     """
-    Fetch all quotes from the Jobber API using pagination and extract inventory information.
+    Fetch all quotes from the Jobber API and aggregate their inventory information.
     
     Args:
-        access_token (str): The access token for the Jobber API
+        client (JobberClient): The shared Jobber API client
+        sync_cache (dict): Optional sync cache. When given, only quotes changed since the
+                           cached watermark are fetched and merged into the cached quotes. The
+                           cached quotes are fetched again if some were deleted in Jobber.
+        formatted (bool): Whether to aggregate the formatted view (default: True)
+        unformatted (bool): Whether to aggregate the unformatted view (default: True)
+        resume (bool): Whether to resume from the checkpoint of an interrupted run (default: True)
+        page_size (int): Size of the first page (default: PAGE_SIZE_INITIAL)
+        inventories (tuple): (formatted, unformatted) InventoryAggregator to count into,
+                             e.g. shared with the quotes (default: new ones)
         
     Returns:
-        list: A list of InventoryItem objects extracted from quote line items
+        tuple: (formatted, unformatted) InventoryAggregator with the quotes counted under source 'quotes'.
+               A view that was not requested is None.
     """
-    # Initialize variables for pagination
-    cursor = None
-    has_next_page = True
-    all_quotes = []
-    batch_count = 0
+    return collect_inventory(client, "quotes", iter_quote_pages, extract_quote_inventory,
+                             sync_cache, formatted, unformatted, resume, page_size, inventories,
+                             count_records=get_quote_count)
+
+def get_all_inventory(client, sync_cache=None, concurrent=False, formatted=True, unformatted=True, resume=True,
+                      page_sizes=None):
+    """
+    Fetch and process both quotes and jobs.
     
-    # Import time for sleep functionality
-    import time
+    Both record types are counted into the same aggregators, one per view, under their own
+    source. In concurrent mode they are fetched and processed on two threads. Both threads
+    share the client and its throttle bucket, so together they never spend more than the
+    API budget allows.
     
-    # Loop until we've fetched all quotes
-    while has_next_page:
-    # for _ in range (5):
-        batch_count += 1
-        print(f"\nFetching batch {batch_count} of quotes...")
-        
-        # Fetch 5 quotes at a time using cursor-based pagination
-        quotes_data = fetch_quotes(access_token, after=cursor, limit=5)
-        
-        # Extract quotes from this batch
-        batch_quotes = quotes_data["data"]["quotes"]["nodes"]
-        all_quotes.extend(batch_quotes)
-        
-        # Get pagination info for next batch
-        pagination_info = quotes_data["data"]["quotes"]["pageInfo"]
-        cursor = pagination_info["endCursor"]
-        has_next_page = pagination_info["hasNextPage"]
-        
-        print(f"Retrieved {len(batch_quotes)} quotes in this batch")
-        print(f"Total quotes fetched so far: {len(all_quotes)}")
+    Args:
+        client (JobberClient): The shared Jobber API client
+        sync_cache (dict): Optional sync cache for incremental mode
+        concurrent (bool): Whether to fetch quotes and jobs at the same time (default: False)
+        formatted (bool): Whether to aggregate the formatted view (default: True)
+        unformatted (bool): Whether to aggregate the unformatted view (default: True)
+        resume (bool): Whether to resume from the checkpoints of an interrupted run (default: True)
+        page_sizes (dict): First page size per record type, e.g. from plan_sync (default: PAGE_SIZE_INITIAL)
         
-        if has_next_page:
-            print("Sleeping for 1 second before next batch...")
-            time.sleep(1)
-        else:
-            print("No more quotes to fetch.")
+    Returns:
+        tuple: (formatted, unformatted) InventoryAggregator with sources 'quotes' and 'jobs'.
+               A view that was not requested is None.
+    """
+    inventories = (InventoryAggregator() if formatted else None,
+                   InventoryAggregator() if unformatted else None)
     
-    # Process all quotes to extract inventory information
-    formatted_inventory_items = []
-    unformatted_inventory_items = []
+    def run_stream(stream_name, get_all):
+        start_time = time.monotonic()
+        print(f"[{stream_name}] Starting sync")
+        get_all(client, sync_cache, formatted=formatted, unformatted=unformatted, resume=resume,
+                page_size=(page_sizes or {}).get(stream_name, PAGE_SIZE_INITIAL), inventories=inventories)
+        print(f"[{stream_name}] Finished in {time.monotonic() - start_time:.1f} seconds")
     
-    for quote in all_quotes:
-        formatted_quote_inventory = process_quote_inventory(quote, formatData=True)
-        unformatted_quote_inventory = process_quote_inventory(quote, formatData=False)
-        
-        formatted_inventory_items.extend(formatted_quote_inventory)
-        unformatted_inventory_items.extend(unformatted_quote_inventory)
+    if not concurrent:
+        run_stream("quotes", get_all_quotes)
+        run_stream("jobs", get_all_jobs)
+        return inventories
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="sync") as executor:
+        quotes_future = executor.submit(run_stream, "quotes", get_all_quotes)
+        jobs_future = executor.submit(run_stream, "jobs", get_all_jobs)
+        quotes_future.result()
+        jobs_future.result()
+    return inventories
+
+# Record type -> (status field, statuses to keep) of the configured status filters
+STATUS_FILTERS = {
+    "quotes": ("quoteStatus", QUOTE_STATUSES),
+    "jobs": ("jobStatus", JOB_STATUSES)
+}
+
+def record_in_scope(stream_name, record):
+    """
+    Check a record against the configured status and date filters. Normally the API already
+    applied them, but records from the incremental sync cache are fetched unfiltered.
     
-    return formatted_inventory_items, unformatted_inventory_items
+    Args:
+        stream_name (str): 'quotes' or 'jobs'
+        record (dict): Quote or job data from the Jobber API
+        
+    Returns:
+        bool: True if the record should be counted
+    """
+    status_field, statuses = STATUS_FILTERS[stream_name]
+    if statuses and str(record.get(status_field) or "").lower() not in {status.lower() for status in statuses}:
+        return False
+    if CREATED_AFTER:
+        created_at = parse_timestamp(record.get("createdAt"))
+        if created_at is None or created_at <= parse_timestamp(CREATED_AFTER):
+            return False
+    return True
 
-def combine_inventory(quotes_inventory, jobs_inventory):
+def collect_inventory(client, stream_name, iter_pages, extract_inventory, sync_cache=None,
+                      formatted=True, unformatted=True, resume=True, page_size=PAGE_SIZE_INITIAL, inventories=None,
+                      checkpoint_interval=SYNC_CHECKPOINT_INTERVAL, count_records=None):
     """
-    Combines inventory items from quotes and jobs inventories.
-    Items with the same SKU and name will have their counts stored separately.
-    Description from jobs_inventory is prioritized if available.
+    Fetch one record type page by page and aggregate its inventory.
+    
+    Without a sync cache each page is turned into inventory counts as soon as it arrives and
+    then dropped, so memory use does not grow with the number of records. With a sync cache
+    only records updated after the cached watermark are requested; each page replaces the
+    cached copies of its records and the counts are built from the merged cache at the end.
+    An updatedAt filter never returns deleted records, so after an incremental fetch the
+    number of cached records is checked against Jobber's total, and the cache of this record
+    type is rebuilt from a full fetch when they differ.
+    
+    The cursor and the partial results are checkpointed to disk after a page, at most every
+    checkpoint_interval seconds since each checkpoint rewrites the whole partial result, so a
+    run that fails or is killed part way through can pick up after the last checkpointed page.
     
     Args:
-        quotes_inventory (list): List of inventory items from quotes
-        jobs_inventory (list): List of inventory items from jobs
+        client (JobberClient): The shared Jobber API client
+        stream_name (str): 'quotes' or 'jobs'
+        iter_pages (callable): iter_quote_pages or iter_job_pages
+        extract_inventory (callable): extract_quote_inventory or extract_job_inventory
+        sync_cache (dict): Optional sync cache for incremental mode
+        formatted (bool): Whether to aggregate the formatted view
+        unformatted (bool): Whether to aggregate the unformatted view
+        resume (bool): Whether to resume from the checkpoint of an interrupted run
+        page_size (int): Size of the first page
+        inventories (tuple): (formatted, unformatted) InventoryAggregator to count into (default: new ones)
+        checkpoint_interval (float): Minimum seconds between checkpoints, 0 to checkpoint every page
+        count_records (callable): get_quote_count or get_job_count, to find records deleted since
+                                  the last incremental sync (default: don't check)
         
     Returns:
-        list: Combined inventory with separate quotes_count and jobs_count for matching items,
-             first sorted by presence of SKU (items with SKUs first), then alphabetically by SKU or name
-    """
-    combined_inventory = []
-    inventory_map = {}
-    
-    # Process all quotes inventory items
-    for item in quotes_inventory:
-        # Create a unique key for each item based on sku and name only
-        key = (item['sku'], item['name'])
-        inventory_map[key] = {
-            'sku': item['sku'],
-            'name': item['name'],
-            'description': item['description'],
-            'quotes_count': item['count'],
-            'jobs_count': 0  # Initialize jobs_count to 0
-        }
-    
-    # Process all jobs inventory items
-    for item in jobs_inventory:
-        key = (item['sku'], item['name'])
-        if key in inventory_map:
-            # Item exists in quotes inventory, set the jobs_count
-            inventory_map[key]['jobs_count'] = item['count']
-            # Prioritize description from jobs_inventory
-            inventory_map[key]['description'] = item['description']
+        tuple: (formatted, unformatted) InventoryAggregator with this record type counted under
+               source stream_name - a view that was not requested is None
+    """
+    formatted_inventory, unformatted_inventory = inventories or (InventoryAggregator(), InventoryAggregator())
+    
+    def aggregate(records):
+        # Each line item is walked once for both views
+        for record in records:
+            if not record_in_scope(stream_name, record):
+                continue
+            formatted_items, unformatted_items = extract_inventory(record, formatted, unformatted)
+            if formatted:
+                formatted_inventory.add(formatted_items, stream_name)
+            if unformatted:
+                unformatted_inventory.add(unformatted_items, stream_name)
+    
+    stream_cache = sync_cache[stream_name] if sync_cache is not None else None
+    updated_after = fetch_updated_after(stream_cache) if stream_cache is not None else None
+    if stream_cache is not None:
+        if updated_after:
+            print(f"[{stream_name}] Fetching {stream_name} updated after {updated_after}...")
         else:
-            # New item, add it to the map with quotes_count as 0
-            inventory_map[key] = {
-                'sku': item['sku'],
-                'name': item['name'],
-                'description': item['description'],
-                'quotes_count': 0,  # Initialize quotes_count to 0
-                'jobs_count': item['count']
-            }
-    # Convert the map back to a list
-    combined_inventory = list(inventory_map.values())
+            print(f"[{stream_name}] No watermark, fetching everything...")
     
-    # First, separate items with and without SKUs
-    with_sku = []
-    without_sku = []
+    # A checkpoint can only be resumed by a run that asks for exactly the same pages and views
+    run_key = {
+        "incremental": stream_cache is not None,
+        "quantity_mode": QUANTITY_MODE,
+        "statuses": STATUS_FILTERS[stream_name][1],
+        "created_after": CREATED_AFTER,
+        "updated_after": updated_after,
+        "formatted": formatted,
+        "unformatted": unformatted
+    }
+    checkpoint = load_checkpoint(stream_name, run_key) if resume else None
     
-    for item in combined_inventory:
-        if item['sku']:
-            with_sku.append(item)
+    cursor = None
+    complete = False
+    changed_records = {}
+    if checkpoint:
+        cursor = checkpoint["cursor"]
+        complete = checkpoint["complete"]
+        state = checkpoint["state"]
+        if stream_cache is not None:
+            changed_records = state["records"]
+            merge_records(stream_cache, changed_records.values())
         else:
-            without_sku.append(item)
+            if formatted:
+                formatted_inventory.load(state["formatted"], stream_name)
+            if unformatted:
+                unformatted_inventory.load(state["unformatted"], stream_name)
+        print(f"[{stream_name}] Resuming from checkpoint" + (" (already complete)" if complete else f" after cursor {cursor}"))
     
-    # Sort items with SKUs alphabetically by SKU
-    with_sku.sort(key=lambda x: x['sku'].lower() if x['sku'] else "")
+    def checkpoint_state():
+        if stream_cache is not None:
+            return {"records": changed_records}
+        return {"formatted": formatted_inventory.dump(stream_name) if formatted else [],
+                "unformatted": unformatted_inventory.dump(stream_name) if unformatted else []}
     
-    # Sort items without SKUs alphabetically by name
-    without_sku.sort(key=lambda x: x['name'].lower() if x['name'] else "")
+    if not complete:
+        last_checkpoint = time.monotonic()
+        # The cache must see every change (e.g. a quote that was just converted), so in
+        # incremental mode the status and date filters are applied locally instead
+        for page, cursor in iter_pages(client, updated_after=updated_after, after=cursor,
+                                       server_filters=stream_cache is None, page_size=page_size):
+            if stream_cache is not None:
+                merge_records(stream_cache, page)
+                changed_records.update((record["id"], record) for record in page)
+            else:
+                aggregate(page)
+            if time.monotonic() - last_checkpoint >= checkpoint_interval:
+                save_checkpoint(stream_name, run_key, cursor, checkpoint_state())
+                last_checkpoint = time.monotonic()
+        
+        save_checkpoint(stream_name, run_key, cursor, checkpoint_state(), complete=True)
     
-    # Combine the sorted lists, with SKU items first
-    combined_inventory = with_sku + without_sku
+    if stream_cache is not None:
+        print(f"[{stream_name}] Synced {len(changed_records)} changed {stream_name}, "
+              f"{len(stream_cache['records'])} {stream_name} in cache")
+        if updated_after and count_records is not None:
+            # The cache holds every record unfiltered, so compare with the unfiltered total
+            total = count_records(client)
+            if total != len(stream_cache["records"]):
+                print(f"[{stream_name}] Jobber has {total} {stream_name}, rebuilding the {stream_name} cache")
+                sync_cache[stream_name] = empty_sync_cache()[stream_name]
+                return collect_inventory(client, stream_name, iter_pages, extract_inventory, sync_cache,
+                                         formatted, unformatted, resume, page_size, inventories, checkpoint_interval)
+        # The cache keeps every record, so aggregate over all of them once the changes are merged
+        aggregate(stream_cache["records"].values())
     
-    return combined_inventory
+    return (formatted_inventory if formatted else None,
+            unformatted_inventory if unformatted else None)
 
-def read_inventory_csv(csv_path="inventory_download.csv", formatSkuData=True):
+def read_inventory_csv_views(csv_path="inventory_download.csv", formatted=True, unformatted=True):
     """
-    Read inventory data from a CSV file and format it according to our naming/SKU conventions.
+    Read inventory data from a CSV file once and build the formatted and/or unformatted view of it.
     
     Args:
         csv_path (str): Path to the CSV file
-        formatSkuData (bool): Whether to apply SKU detection and rearrangement logic (default: True)
+        formatted (bool): Whether to build items with SKU detection and rearrangement applied
+        unformatted (bool): Whether to build items with the names kept as they are
         
     Returns:
-        list: List of InventoryItem objects
+        tuple: (formatted, unformatted) lists of InventoryItem objects - empty if not requested
     """
     import csv
     
-    inventory_items = []
+    formatted_items = []
+    unformatted_items = []
     
     try:
         with open(csv_path, 'r', encoding='utf-8') as csvfile:
             reader = csv.DictReader(csvfile)
             
             for row in reader:
-                # Create a new inventory item
-                item = InventoryItem()
-                
                 # Get the name from the first column
                 name = row.get('Name', '')
                 description = row.get('Description', '')
                 category = row.get('Category', '')
                 
-                # Apply name/SKU logic only if formatSkuData is True
-                if formatSkuData and is_name_sku(name):
-                    # If name is a SKU, set sku to name
-                    item.sku = name
-                    # Use description as the name
-                    item.name = description
-                else:
-                    # If name is not a SKU or formatSkuData is False, keep name as is
-                    item.name = name
-                    # Set to empty string instead of None for consistency
-                    item.sku = ""
-                
-                # Set description and category
-                item.description = description
-                item.category = category
-                item.source_location = "CSV Import"
+                if formatted:
+                    if is_name_sku(name):
+                        # If name is a SKU, set sku to name and use description as the name
+                        item = InventoryItem(name=description, sku=name, description=description,
+                                             source_location="CSV Import", category=category)
+                    else:
+                        # Set to empty string instead of None for consistency
+                        item = InventoryItem(name=name, sku="", description=description,
+                                             source_location="CSV Import", category=category)
+                    formatted_items.append(item)
                 
-                inventory_items.append(item)
+                if unformatted:
+                    unformatted_items.append(InventoryItem(name=name, sku="", description=description,
+                                                           source_location="CSV Import", category=category))
                 
-        print(f"Successfully read {len(inventory_items)} items from CSV file")
-        return inventory_items
+        print(f"Successfully read {max(len(formatted_items), len(unformatted_items))} items from CSV file")
+        return formatted_items, unformatted_items
         
     except Exception as e:
         print(f"Error reading CSV file: {e}")
-        return []
+        return [], []
+
+def read_inventory_csv(csv_path="inventory_download.csv", formatSkuData=True):
+    """
+    Read inventory data from a CSV file and format it according to our naming/SKU conventions.
+    
+    Args:
+        csv_path (str): Path to the CSV file
+        formatSkuData (bool): Whether to apply SKU detection and rearrangement logic (default: True)
+        
+    Returns:
+        list: List of InventoryItem objects
+    """
+    formatted_items, unformatted_items = read_inventory_csv_views(
+        csv_path, formatted=formatSkuData, unformatted=not formatSkuData)
+    return formatted_items if formatSkuData else unformatted_items
 
 def upload_inventory_from_csv(csv_path="inventory_download.csv"):
     """
     Read inventory data from a CSV file and upload it to Google Sheets.
     This function ensures no duplicates are created and preserves existing quantity data.
+    The CSV is read once and only the views that are published are built, through the
+    same InventoryAggregator as the synced quotes and jobs.
     
     Args:
         csv_path (str): Path to the CSV file
-        formatSkuData (bool): Whether to apply SKU detection and rearrangement logic (default: True)
         
     Returns:
         bool: True if successful, False otherwise
     """
     # Read the CSV file
-    formatted_inventory_items = read_inventory_csv(csv_path, formatSkuData=True)
-    unformatted_inventory_items = read_inventory_csv(csv_path, formatSkuData=False)
+    formatted_inventory_items, unformatted_inventory_items = read_inventory_csv_views(
+        csv_path, formatted=bool(FORMATTED_SHEET_NAME), unformatted=bool(UNFORMATTED_SHEET_NAME))
     
     if not formatted_inventory_items and not unformatted_inventory_items:
         print("No inventory items found in the CSV file.")
         return False
     
-    # Format the data for upload
-    # We set quotes_count and jobs_count to 0 for new items
-    # The upload function will preserve existing counts for items already in the sheet
-    formatted_upload_data = []
-    unformatted_upload_data = []
-    for item in formatted_inventory_items:
-        # Standardize: Use empty string for None SKUs
-        sku_value = item.sku if item.sku is not None else ""
-        
-        formatted_upload_data.append({
-            'name': item.name,
-            'sku': sku_value,
-            'description': item.description,
-            'quotes_count': 0,  # Set to 0 for new items
-            'jobs_count': 0     # Set to 0 for new items
-        })
-    
-    for item in unformatted_inventory_items:
-        unformatted_upload_data.append({
-            'name': item.name,
-            'sku': "",
-            'description': item.description,
-            'quotes_count': 0,  # Set to 0 for new items
-            'jobs_count': 0     # Set to 0 for new items
-        })
-    
-    # Upload the data to Google Sheets
-    print(f"Uploading {len(formatted_upload_data)} formatted inventory items to Google Sheets...")
-    # success = upload_inventory_data(formatted_upload_data, sheet_name="Inventory-old")
-    print(f"Uploading {len(unformatted_upload_data)} unformatted inventory items to Google Sheets...")
-    success = upload_inventory_data(unformatted_upload_data, sheet_name="Inventory")
+    # Count the rows under their own source, so duplicate rows collapse into one product and
+    # the rows are emitted in the same order as the synced inventory.
+    # quotes_count and jobs_count are 0 for every item - the upload function
+    # will preserve existing counts for items already in the sheet
+    targets = []
+    if FORMATTED_SHEET_NAME:
+        formatted_inventory = InventoryAggregator()
+        formatted_inventory.add(formatted_inventory_items, "csv")
+        formatted_upload_data = formatted_inventory.combined()
+        print(f"Uploading {len(formatted_upload_data)} formatted inventory items to Google Sheets...")
+        targets.append((FORMATTED_SHEET_NAME, formatted_upload_data))
+    if UNFORMATTED_SHEET_NAME:
+        unformatted_inventory = InventoryAggregator()
+        unformatted_inventory.add(unformatted_inventory_items, "csv")
+        unformatted_upload_data = unformatted_inventory.combined()
+        print(f"Uploading {len(unformatted_upload_data)} unformatted inventory items to Google Sheets...")
+        targets.append((UNFORMATTED_SHEET_NAME, unformatted_upload_data))
+    success = upload_inventory_targets(targets)
     
     if success:
         print("Successfully uploaded inventory data to Google Sheets")
@@ -765,6 +1118,23 @@ def main():
                             help='Path to the CSV file (default: inventory_download.csv)')
         parser.add_argument('--all', action='store_true', 
                             help='Process both quotes/jobs and CSV data')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only fetch quotes/jobs changed since the last run and merge them into the local sync cache')
+        parser.add_argument('--rebuild-cache', action='store_true',
+                            help='Ignore the existing sync cache and rebuild it from a full fetch (implies --incremental)')
+        parser.add_argument('--concurrent', action='store_true', default=None,
+                            help='Fetch and process quotes and jobs at the same time (default: sequentially, '
+                                 'or whichever is faster when the sync is planned)')
+        parser.add_argument('--sequential', dest='concurrent', action='store_false', default=None,
+                            help='Fetch quotes and jobs one after the other, even when the sync is planned')
+        parser.add_argument('--no-resume', action='store_true',
+                            help='Ignore checkpoints left by an interrupted run and start from the first page')
+        parser.add_argument('--cache-path', type=str, default=SYNC_CACHE_PATH,
+                            help=f'Path to the sync cache file (default: {SYNC_CACHE_PATH})')
+        parser.add_argument('--plan', action='store_true',
+                            help='Project the cost and duration of the sync and size its pages before it starts')
+        parser.add_argument('--time-budget', type=float, default=SYNC_TIME_BUDGET,
+                            help='Plan the sync and fail before fetching if it is projected to take longer than this many seconds (default: no budget)')
         
         args = parser.parse_args()
         
@@ -787,26 +1157,52 @@ def main():
         access_token = token_data["access_token"]
         print("Access token obtained successfully")
         
+        # One pooled session for every request to the Jobber API
+        client = JobberClient(access_token)
+        
         if "refresh_token" in token_data:
             new_refresh_token = token_data["refresh_token"]
             print("New refresh token received - save this for future use")
         
-        all_formatted_quote_inventory_items, all_unformatted_quote_inventory_items = get_all_quotes(access_token)
-        all_formatted_job_inventory_items, all_unformatted_job_inventory_items = get_all_jobs(access_token)
+        # In incremental mode we only pull records changed since the last run
+        sync_cache = None
+        if args.rebuild_cache:
+            sync_cache = empty_sync_cache()
+        elif args.incremental:
+            sync_cache = load_sync_cache(args.cache_path)
         
-        # Print aggregated inventory by name
-        aggregated_formatted_quotes_inventory = aggregate_inventory_by_name(all_formatted_quote_inventory_items)
-        aggregated_unformatted_quotes_inventory = aggregate_inventory_by_name(all_unformatted_quote_inventory_items)
+        # If asked, project the cost and duration first, pick the page sizes and, unless
+        # --concurrent/--sequential says otherwise, the faster schedule from it, and stop
+        # before spending any budget if the sync can't finish in time
+        concurrent = bool(args.concurrent)
+        page_sizes = None
+        if args.plan or args.time_budget:
+            plan = plan_sync(client, sync_cache, concurrent=args.concurrent, time_budget=args.time_budget)
+            concurrent = plan["concurrent"]
+            page_sizes = plan["page_sizes"]
         
-        aggregated_formatted_jobs_inventory = aggregate_inventory_by_name(all_formatted_job_inventory_items)
-        aggregated_unformatted_jobs_inventory = aggregate_inventory_by_name(all_unformatted_job_inventory_items)
-
-        # Combine the inventories and sort alphabetically by name
-        combined_formatted_inventory = combine_inventory(aggregated_formatted_quotes_inventory, aggregated_formatted_jobs_inventory)
-        combined_unformatted_inventory = combine_inventory(aggregated_unformatted_quotes_inventory, aggregated_unformatted_jobs_inventory)
+        # Quotes and jobs are aggregated page by page as they are fetched,
+        # and only the views we actually publish are built
+        formatted_inventory, unformatted_inventory = get_all_inventory(client, sync_cache, concurrent=concurrent,
+                                                                       formatted=bool(FORMATTED_SHEET_NAME),
+                                                                       unformatted=bool(UNFORMATTED_SHEET_NAME),
+                                                                       resume=not args.no_resume,
+                                                                       page_sizes=page_sizes)
+        
+        # Only persist the cache once both record types synced successfully
+        if sync_cache is not None:
+            save_sync_cache(sync_cache, args.cache_path)
+        # Both record types are fully fetched, so the next run starts from the first page again
+        clear_checkpoints()
+        
+        # Emit the combined inventories sorted by SKU, then name, and publish every view in one pass
+        targets = []
+        if FORMATTED_SHEET_NAME:
+            targets.append((FORMATTED_SHEET_NAME, formatted_inventory.combined()))
+        if UNFORMATTED_SHEET_NAME:
+            targets.append((UNFORMATTED_SHEET_NAME, unformatted_inventory.combined()))
+        success = upload_inventory_targets(targets)
         
-        # success = upload_inventory_data(combined_formatted_inventory, sheet_name="Inventory-old")
-        success = upload_inventory_data(combined_unformatted_inventory, sheet_name="Inventory")
         if success:
             print("Inventory data uploaded successfully!")
         else:
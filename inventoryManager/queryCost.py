@@ -1,3 +1,17 @@
+import threading
+import time
+from config import PAGE_SIZE_MIN, PAGE_SIZE_MAX
+
+def is_throttled_response(response_data):
+    """
+    Check whether a GraphQL response was rejected by the API throttle.
+    Throttled requests still come back with HTTP 200, with a THROTTLED error instead of data.
+    """
+    for error in response_data.get('errors') or []:
+        if (error.get('extensions') or {}).get('code') == 'THROTTLED' or error.get('message') == 'Throttled':
+            return True
+    return False
+
 def extract_query_cost(response_data):
     """
     Extract query cost information from a GraphQL response.
@@ -11,6 +25,22 @@ def extract_query_cost(response_data):
     if not isinstance(response_data, dict):
         return None
         
+    # Handle the case where we got an error response with throttling information
+    if (is_throttled_response(response_data) and
+        'extensions' in response_data and 'cost' in response_data['extensions']):
+        # This is a throttled response
+        cost_info = response_data['extensions']['cost']
+        
+        return {
+            'is_throttled': True,
+            'requested_cost': cost_info.get('requestedQueryCost', 0),
+            'throttle_status': {
+                'maximum_available': cost_info.get('throttleStatus', {}).get('maximumAvailable', 0),
+                'currently_available': cost_info.get('throttleStatus', {}).get('currentlyAvailable', 0),
+                'restore_rate': cost_info.get('throttleStatus', {}).get('restoreRate', 0)
+            }
+        }
+    
     # Check if the extensions and cost information exist in the response
     if 'extensions' in response_data and 'cost' in response_data['extensions']:
         cost_info = response_data['extensions']['cost']
@@ -36,21 +66,6 @@ def extract_query_cost(response_data):
             
         return cost_data
     
-    # Handle the case where we got an error response with throttling information
-    if 'errors' in response_data and 'extensions' in response_data and 'cost' in response_data['extensions']:
-        # This is a throttled response
-        cost_info = response_data['extensions']['cost']
-        
-        return {
-            'is_throttled': True,
-            'requested_cost': cost_info.get('requestedQueryCost', 0),
-            'throttle_status': {
-                'maximum_available': cost_info.get('throttleStatus', {}).get('maximumAvailable', 0),
-                'currently_available': cost_info.get('throttleStatus', {}).get('currentlyAvailable', 0),
-                'restore_rate': cost_info.get('throttleStatus', {}).get('restoreRate', 0)
-            }
-        }
-    
     return None
 
 def log_query_cost(response_data, query_name="Unknown query"):
@@ -90,3 +105,118 @@ def log_query_cost(response_data, query_name="Unknown query"):
               f"of {cost_data['throttle_status']['maximum_available']} points " +
               f"({cost_data['throttle_status']['percentage_used']}% used)")
         print(f"  Restore rate: {cost_data['throttle_status']['restore_rate']} points/second")
+
+def plan_next_page(cost_data, limit, min_size=PAGE_SIZE_MIN, max_size=PAGE_SIZE_MAX):
+    """
+    Pick the size of the next page from the cost of the last one.
+    
+    The cost of a page grows roughly linearly with the number of records requested, so the
+    cost per record measured on the last page tells us how many records the currently
+    available points can pay for. The page size can at most double from one page to the
+    next so a bad estimate never produces a single huge, rejected request. Waiting for
+    the points to restore is left to the throttle bucket.
+    
+    Args:
+        cost_data (dict): Output of extract_query_cost for the last page
+        limit (int): Page size used for the last page
+        min_size (int): Smallest page size worth requesting
+        max_size (int): Largest page size the API accepts
+        
+    Returns:
+        int: Size of the next page
+    """
+    if not cost_data or not cost_data.get('requested_cost') or limit <= 0:
+        # No cost information - keep the page size
+        return limit
+    
+    available = cost_data['throttle_status']['currently_available']
+    cost_per_record = cost_data['requested_cost'] / limit
+    
+    # Largest page the current budget can pay for, bounded by the allowed range and growth
+    affordable = int(available // cost_per_record)
+    return max(min_size, min(affordable, max_size, limit * 2))
+
+class ThrottleBucket:
+    """
+    Client-side model of the Jobber API throttle.
+    
+    Jobber meters requests with a leaky bucket of query cost points: it holds at most
+    maximumAvailable points and refills at restoreRate points per second. We mirror that
+    bucket locally, resync it from the extensions.cost of every response and wait before
+    sending a request until the bucket can pay for it, so requests are never rejected.
+    """
+    
+    def __init__(self, maximum_available=10000, restore_rate=500):
+        self.maximum_available = maximum_available
+        self.restore_rate = restore_rate
+        self.available = maximum_available
+        self.updated_at = time.monotonic()
+        # Requested cost per unit (usually per record in a page) of each query we have seen
+        self.unit_costs = {}
+        self.lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.maximum_available,
+                             self.available + (now - self.updated_at) * self.restore_rate)
+        self.updated_at = now
+    
+    def estimate(self, query_name, units=1):
+        """Estimate the cost of a query from what it cost last time, or 0 if we haven't seen it yet."""
+        return self.unit_costs.get(query_name, 0) * units
+    
+    def acquire(self, cost):
+        """
+        Block until the bucket holds enough points for a request, then take them.
+        
+        Args:
+            cost (float): Expected cost of the request in points
+            
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                # A request can never cost more than a full bucket
+                cost = min(cost, self.maximum_available)
+                if self.available >= cost:
+                    self.available -= cost
+                    return waited
+                wait_time = (cost - self.available) / self.restore_rate if self.restore_rate > 0 else 1.0
+            print(f"Waiting {wait_time:.2f} seconds for the API budget to restore...")
+            time.sleep(wait_time)
+            waited += wait_time
+    
+    def update(self, response_data, query_name=None, units=1):
+        """
+        Resync the bucket with the throttle status reported in a response.
+        
+        Args:
+            response_data (dict): The JSON response from a GraphQL query
+            query_name (str): Name of the query, used to remember its cost for future estimates
+            units (int): Units the query was sized with (e.g. the page size)
+            
+        Returns:
+            dict: The cost data from extract_query_cost, or None if not available
+        """
+        cost_data = extract_query_cost(response_data)
+        if not cost_data:
+            return None
+        
+        throttle_status = cost_data['throttle_status']
+        with self.lock:
+            if throttle_status['maximum_available'] > 0:
+                self.maximum_available = throttle_status['maximum_available']
+            if throttle_status['restore_rate'] > 0:
+                self.restore_rate = throttle_status['restore_rate']
+            self.available = throttle_status['currently_available']
+            self.updated_at = time.monotonic()
+            if query_name and cost_data['requested_cost'] and units > 0:
+                self.unit_costs[query_name] = cost_data['requested_cost'] / units
+        
+        return cost_data
+
+# Shared by every request to the Jobber API in this process
+jobber_throttle = ThrottleBucket()
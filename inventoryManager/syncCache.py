@@ -0,0 +1,215 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from config import SYNC_CACHE_PATH, SYNC_WATERMARK_OVERLAP, SYNC_CHECKPOINT_PREFIX, SYNC_CHECKPOINT_MAX_AGE
+
+# Bump this whenever the layout of the cache file changes so old caches get rebuilt
+CACHE_VERSION = 1
+
+# Record types we keep in the cache
+CACHE_STREAMS = ("quotes", "jobs")
+
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp or date into an aware datetime so timestamps with different
+    offsets ("Z", "+00:00", "-05:00") compare correctly. Values without an offset, including
+    plain dates, are taken as UTC.
+    
+    Args:
+        value (str): Timestamp such as "2024-03-01T12:00:00Z" or "2024-03-01"
+        
+    Returns:
+        datetime: The parsed timestamp, or None if value is empty
+    
+    Raises:
+        ValueError: If value is not an ISO 8601 timestamp
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def empty_sync_cache():
+    """Return a new, empty sync cache structure."""
+    return {
+        "version": CACHE_VERSION,
+        **{stream: {"watermark": None, "records": {}} for stream in CACHE_STREAMS}
+    }
+
+def load_sync_cache(cache_path=SYNC_CACHE_PATH):
+    """
+    Load the local sync cache from disk.
+    
+    Args:
+        cache_path (str): Path to the cache file
+        
+    Returns:
+        dict: The cache, or an empty cache if the file is missing, unreadable or from an older version
+    """
+    if not os.path.exists(cache_path):
+        print(f"No sync cache found at {cache_path}, a full sync will be performed")
+        return empty_sync_cache()
+    
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Could not read sync cache {cache_path}: {e}. A full sync will be performed")
+        return empty_sync_cache()
+    
+    if cache.get("version") != CACHE_VERSION:
+        print(f"Sync cache version mismatch ({cache.get('version')} != {CACHE_VERSION}), a full sync will be performed")
+        return empty_sync_cache()
+    
+    for stream in CACHE_STREAMS:
+        cache.setdefault(stream, {"watermark": None, "records": {}})
+        print(f"Loaded {len(cache[stream]['records'])} cached {stream} (watermark: {cache[stream]['watermark']})")
+    
+    return cache
+
+def write_json_atomically(data, path):
+    """
+    Write JSON to a temporary path first and then move it into place,
+    so a crash mid-write never leaves a truncated file behind.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def save_sync_cache(cache, cache_path=SYNC_CACHE_PATH):
+    """
+    Write the sync cache to disk.
+    
+    Args:
+        cache (dict): The cache to save
+        cache_path (str): Path to the cache file
+    """
+    write_json_atomically(cache, cache_path)
+    print(f"Saved sync cache to {cache_path}")
+
+def merge_records(stream_cache, nodes):
+    """
+    Merge freshly fetched records into a stream of the cache and advance its watermark.
+    
+    Records are keyed on their Jobber id, so a changed record replaces its cached copy.
+    The watermark is the newest updatedAt seen from the API rather than the local clock,
+    which keeps us safe from clock skew between this machine and Jobber.
+    
+    Args:
+        stream_cache (dict): The 'quotes' or 'jobs' entry of the cache
+        nodes (list): Records returned by the API
+        
+    Returns:
+        int: Number of records that were not in the cache before
+    """
+    records = stream_cache["records"]
+    watermark = stream_cache.get("watermark")
+    newest = parse_timestamp(watermark)
+    new_count = 0
+    
+    for node in nodes:
+        if node["id"] not in records:
+            new_count += 1
+        records[node["id"]] = node
+        
+        updated_at = parse_timestamp(node.get("updatedAt"))
+        if updated_at and (newest is None or updated_at > newest):
+            watermark, newest = node["updatedAt"], updated_at
+    
+    stream_cache["watermark"] = watermark
+    return new_count
+
+def fetch_updated_after(stream_cache, overlap=SYNC_WATERMARK_OVERLAP):
+    """
+    Timestamp an incremental sync of one record type fetches changes after.
+    
+    The watermark is the newest updatedAt we have seen, but another record may have been updated
+    in the same second after its page was fetched. Going back overlap seconds picks such records
+    up on the next run; merge_records replaces the ones we already have.
+    
+    Args:
+        stream_cache (dict): The 'quotes' or 'jobs' entry of the cache
+        overlap (float): Seconds to go back from the watermark
+        
+    Returns:
+        str: ISO 8601 timestamp in UTC, or None if nothing was synced yet
+    """
+    watermark = parse_timestamp(stream_cache.get("watermark"))
+    if watermark is None:
+        return None
+    updated_after = watermark.astimezone(timezone.utc) - timedelta(seconds=overlap)
+    return updated_after.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def checkpoint_path(stream, prefix=SYNC_CHECKPOINT_PREFIX):
+    """Path of the pagination checkpoint for one record type."""
+    return f"{prefix}_{stream}.json"
+
+def load_checkpoint(stream, run_key, prefix=SYNC_CHECKPOINT_PREFIX, max_age_hours=SYNC_CHECKPOINT_MAX_AGE):
+    """
+    Load the pagination checkpoint left behind by an interrupted sync of one record type.
+    
+    A checkpoint is only used if it was written by a run with the same settings (run_key)
+    and is recent enough, otherwise the sync starts from the first page.
+    
+    Args:
+        stream (str): 'quotes' or 'jobs'
+        run_key (dict): Settings the checkpoint must have been written with
+        prefix (str): Checkpoint file prefix
+        max_age_hours (float): Ignore checkpoints older than this
+        
+    Returns:
+        dict: The checkpoint with 'cursor', 'complete' and 'state' keys, or None
+    """
+    path = checkpoint_path(stream, prefix)
+    if not os.path.exists(path):
+        return None
+    
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[{stream}] Could not read checkpoint {path}: {e}")
+        return None
+    
+    if checkpoint.get("version") != CACHE_VERSION or checkpoint.get("run_key") != run_key:
+        print(f"[{stream}] Ignoring checkpoint from a run with different settings")
+        return None
+    
+    age_hours = (time.time() - checkpoint.get("saved_at", 0)) / 3600
+    if age_hours > max_age_hours:
+        print(f"[{stream}] Ignoring checkpoint from {age_hours:.1f} hours ago")
+        return None
+    
+    return checkpoint
+
+def save_checkpoint(stream, run_key, cursor, state, complete=False, prefix=SYNC_CHECKPOINT_PREFIX):
+    """
+    Persist the progress of a sync after a page has been processed.
+    
+    Args:
+        stream (str): 'quotes' or 'jobs'
+        run_key (dict): Settings of the current run
+        cursor (str): endCursor of the last processed page
+        state (dict): Partial results to restore on resume
+        complete (bool): Whether the last page has been processed
+        prefix (str): Checkpoint file prefix
+    """
+    write_json_atomically({
+        "version": CACHE_VERSION,
+        "run_key": run_key,
+        "saved_at": time.time(),
+        "cursor": cursor,
+        "complete": complete,
+        "state": state
+    }, checkpoint_path(stream, prefix))
+
+def clear_checkpoints(prefix=SYNC_CHECKPOINT_PREFIX):
+    """Remove the checkpoints of all record types once a sync has finished."""
+    for stream in CACHE_STREAMS:
+        path = checkpoint_path(stream, prefix)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,176 @@
+import math
+from getterFunctions import (fetch_quotes, fetch_jobs, get_quote_count, get_job_count, build_filter,
+                             has_more_line_items, fetch_remaining_line_items)
+from queryCost import extract_query_cost, jobber_throttle
+from syncCache import fetch_updated_after
+from config import (PAGE_SIZE_MIN, PAGE_SIZE_MAX, QUOTE_STATUSES, JOB_STATUSES, CREATED_AFTER,
+                    SYNC_TIME_BUDGET, PAGE_LATENCY, PLAN_SAMPLE_SIZE)
+
+# Record type -> (count function, fetch function, statuses fetched)
+SYNC_STREAMS = {
+    "quotes": (get_quote_count, fetch_quotes, QUOTE_STATUSES),
+    "jobs": (get_job_count, fetch_jobs, JOB_STATUSES)
+}
+
+class SyncBudgetExceeded(Exception):
+    """Raised when a sync is projected to take longer than its time budget."""
+
+class MeteredClient:
+    """Wraps a JobberClient and adds up the requested cost of the requests sent through it."""
+    
+    def __init__(self, client):
+        self.client = client
+        self.cost = 0
+    
+    def execute(self, payload, query_name, **kwargs):
+        response_data = self.client.execute(payload, query_name, **kwargs)
+        cost_data = extract_query_cost(response_data)
+        self.cost += cost_data['requested_cost'] if cost_data else 0
+        return response_data
+
+def measure_cost_per_record(client, connection, fetch_page, sample_size=PLAN_SAMPLE_SIZE):
+    """
+    Measure what one record of a connection costs by fetching a small sample page.
+    
+    The requested cost of a page is a static estimate that only depends on the query and
+    the page size, so one small page tells us the cost of any page size. Records with more
+    line items than the window fetched with them need follow-up requests, so the sample's
+    records are completed like a sync would, and what that costs is spread over them.
+    
+    Args:
+        client (JobberClient): The shared Jobber API client
+        connection (str): 'quotes' or 'jobs'
+        fetch_page (callable): fetch_quotes or fetch_jobs
+        sample_size (int): Records in the sample page
+        
+    Returns:
+        tuple: (page cost, follow-up cost) in requested cost points per record, 0 if the API reported no cost
+    """
+    response_data = fetch_page(client, limit=sample_size)
+    cost_data = extract_query_cost(response_data)
+    page_cost = cost_data['requested_cost'] / sample_size if cost_data else 0
+    
+    records = (((response_data.get("data") or {}).get(connection) or {}).get("nodes")) or []
+    follow_up_cost = 0
+    if any(has_more_line_items(record) for record in records):
+        metered_client = MeteredClient(client)
+        fetch_remaining_line_items(metered_client, connection, records)
+        follow_up_cost = metered_client.cost / len(records)
+    return page_cost, follow_up_cost
+
+def count_sync_records(client, count_records, statuses, updated_after=None, server_filters=True):
+    """
+    Count the records a sync will fetch, with the same filters the fetch uses.
+    
+    A full sync only fetches records in the configured statuses and date window, one status
+    at a time. An incremental sync fetches every record changed since the watermark, and
+    everything on its first run, and filters them locally.
+    """
+    if not server_filters:
+        return count_records(client, build_filter(updated_after=updated_after))
+    return sum(count_records(client, build_filter(updated_after, status, CREATED_AFTER))
+               for status in statuses or [None])
+
+def choose_page_size(cost_per_record, maximum_available, min_size=PAGE_SIZE_MIN, max_size=PAGE_SIZE_MAX):
+    """Pick the largest page size a full throttle bucket can pay for, within the allowed range."""
+    if cost_per_record <= 0:
+        return max_size
+    return max(min_size, min(max_size, int(maximum_available // cost_per_record)))
+
+def project_stream(record_count, cost_per_record, page_size, page_latency=PAGE_LATENCY):
+    """
+    Project the pages, cost points and network time of fetching one record type.
+    
+    Returns:
+        dict: records, page_size, pages, cost and latency (seconds spent waiting on responses)
+    """
+    pages = max(1, math.ceil(record_count / page_size))
+    return {
+        "records": record_count,
+        "page_size": page_size,
+        "pages": pages,
+        "cost": record_count * cost_per_record,
+        "latency": pages * page_latency
+    }
+
+def project_duration(streams, concurrent, available, restore_rate):
+    """
+    Project how long fetching all streams takes.
+    
+    A sync is bound either by the API budget - everything beyond the points available now has
+    to be restored first, whether the streams run together or not - or by the round trips
+    of its pages, which overlap when the streams are fetched concurrently.
+    """
+    total_cost = sum(stream["cost"] for stream in streams.values())
+    budget_time = max(0.0, total_cost - available) / restore_rate if restore_rate > 0 else 0.0
+    latencies = [stream["latency"] for stream in streams.values()]
+    latency_time = max(latencies, default=0.0) if concurrent else sum(latencies)
+    return max(budget_time, latency_time)
+
+def plan_sync(client, sync_cache=None, concurrent=None, time_budget=SYNC_TIME_BUDGET, throttle=jobber_throttle):
+    """
+    Project the cost, page count and duration of a sync before it starts, and plan it.
+    
+    Each record type is counted and its cost per record measured with one small page, which
+    picks the page size the throttle bucket can afford. The follow-up requests for records
+    with many line items are part of the projected cost, but not of the page size, since
+    they are sent separately. Fetching quotes and jobs concurrently
+    only pays off while the sync is bound by round trips rather than by the API budget, so
+    unless concurrent is given, the faster of the two schedules is chosen.
+    
+    Args:
+        client (JobberClient): The shared Jobber API client
+        sync_cache (dict): Sync cache of an incremental run - only changes since its watermarks are counted
+        concurrent (bool): Force (True) or rule out (False) fetching both record types at once,
+                           None to pick the faster schedule
+        time_budget (float): Seconds the sync may take, 0 for no budget
+        throttle (ThrottleBucket): Throttle bucket with the API budget
+        
+    Returns:
+        dict: The plan - streams (projection per record type), total_cost, duration,
+              concurrent and page_sizes (record type -> first page size)
+              
+    Raises:
+        SyncBudgetExceeded: If the projected duration is over the time budget
+    """
+    streams = {}
+    for stream_name, (count_records, fetch_page, statuses) in SYNC_STREAMS.items():
+        # Incremental syncs fetch every change and filter locally, like collect_inventory
+        updated_after = None
+        if sync_cache is not None:
+            updated_after = fetch_updated_after(sync_cache[stream_name])
+        record_count = count_sync_records(client, count_records, statuses, updated_after,
+                                          server_filters=sync_cache is None)
+        page_cost, follow_up_cost = measure_cost_per_record(client, stream_name, fetch_page)
+        page_size = choose_page_size(page_cost, throttle.maximum_available)
+        streams[stream_name] = project_stream(record_count, page_cost + follow_up_cost, page_size)
+        streams[stream_name]["cost_per_record"] = page_cost + follow_up_cost
+    
+    available, restore_rate = throttle.available, throttle.restore_rate
+    if concurrent is None:
+        concurrent = (project_duration(streams, True, available, restore_rate) <
+                      project_duration(streams, False, available, restore_rate))
+    duration = project_duration(streams, concurrent, available, restore_rate)
+    
+    plan = {
+        "streams": streams,
+        "total_cost": sum(stream["cost"] for stream in streams.values()),
+        "duration": duration,
+        "concurrent": concurrent,
+        "page_sizes": {stream_name: stream["page_size"] for stream_name, stream in streams.items()}
+    }
+    print_sync_plan(plan)
+    
+    if time_budget and duration > time_budget:
+        raise SyncBudgetExceeded(f"Sync is projected to take {duration:.0f} seconds, "
+                                 f"over the budget of {time_budget:.0f} seconds")
+    return plan
+
+def print_sync_plan(plan):
+    """Log a sync plan in a readable format."""
+    print("\n=== SYNC PLAN ===")
+    for stream_name, stream in plan["streams"].items():
+        print(f"[{stream_name}] {stream['records']} records at {stream['cost_per_record']:.0f} points each: "
+              f"{stream['pages']} pages of {stream['page_size']}, {stream['cost']:.0f} points")
+    print(f"Total: {plan['total_cost']:.0f} points, about {plan['duration']:.0f} seconds "
+          f"({'concurrent' if plan['concurrent'] else 'sequential'})")
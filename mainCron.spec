@@ -22,6 +22,9 @@ a = Analysis(
         'queryCost',
         'config',
         'googleSheetsManager',
+        'syncCache',
+        'jobberClient',
+        'syncPlanner',
         'requests',
         'json',
         'pprint',
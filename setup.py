@@ -33,7 +33,10 @@ build_exe_options = {
         "getterFunctions", 
         "queryCost", 
         "config", 
-        "googleSheetsManager"
+        "googleSheetsManager",
+        "syncCache",
+        "jobberClient",
+        "syncPlanner"
     ],
     "include_files": [
         # Include JSON credentials file
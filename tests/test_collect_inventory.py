@@ -0,0 +1,93 @@
+import mainCron
+
+
+def quote(record_id, name):
+    return {"id": record_id, "quoteStatus": "approved", "createdAt": "2024-02-01T00:00:00Z",
+            "lineItems": {"nodes": [{"name": name, "description": "", "quantity": 1}]}}
+
+
+def pages(records, page_length=2):
+    def iter_pages(client, updated_after=None, after=None, **kwargs):
+        start = int(after) if after else 0
+        for i in range(start, len(records), page_length):
+            yield records[i:i + page_length], str(i + page_length)
+    return iter_pages
+
+
+def collect(monkeypatch, tmp_path, checkpoint_interval):
+    monkeypatch.chdir(tmp_path)
+    saved = []
+    save_checkpoint = mainCron.save_checkpoint
+    monkeypatch.setattr(mainCron, "save_checkpoint",
+                        lambda *args, **kwargs: saved.append(args[2]) or save_checkpoint(*args, **kwargs))
+    records = [quote(str(i), f"Part {i % 3}") for i in range(7)]
+    inventories = mainCron.collect_inventory(None, "quotes", pages(records), mainCron.extract_quote_inventory,
+                                             formatted=False, checkpoint_interval=checkpoint_interval)
+    return saved, inventories[1]
+
+
+def test_checkpoints_every_page_without_an_interval(monkeypatch, tmp_path):
+    saved, _ = collect(monkeypatch, tmp_path, checkpoint_interval=0)
+    
+    assert saved == ["2", "4", "6", "8", "8"]
+
+
+def test_checkpoint_interval_limits_the_rewrites(monkeypatch, tmp_path):
+    saved, inventory = collect(monkeypatch, tmp_path, checkpoint_interval=3600)
+    
+    # Only the final checkpoint, which marks the record type complete
+    assert saved == ["8"]
+    assert [(row["name"], row["count"]) for row in inventory.results("quotes")] == \
+        [("Part 0", 3), ("Part 1", 2), ("Part 2", 2)]
+
+
+def test_created_after_compares_timestamps_not_strings(monkeypatch):
+    monkeypatch.setattr(mainCron, "STATUS_FILTERS", {"quotes": ("quoteStatus", None)})
+    
+    def in_scope(created_at, created_after):
+        monkeypatch.setattr(mainCron, "CREATED_AFTER", created_after)
+        return mainCron.record_in_scope("quotes", {"createdAt": created_at})
+    
+    # 8:00 in New York is 13:00 UTC, so after noon UTC although the string sorts before it
+    assert in_scope("2024-03-01T08:00:00-05:00", "2024-03-01T12:00:00Z")
+    assert not in_scope("2024-03-01T12:00:00Z", "2024-03-01T12:00:00+00:00")
+    # A plain date means midnight UTC
+    assert in_scope("2024-03-01T00:00:01Z", "2024-03-01")
+    assert not in_scope("2024-02-29T23:59:59Z", "2024-03-01")
+    assert not in_scope(None, "2024-03-01")
+
+
+class FakeJobber:
+    """Serves quotes like the API: an updatedAt filter only returns records that still exist and changed."""
+    
+    def __init__(self, records):
+        self.records = {record["id"]: record for record in records}
+    
+    def iter_pages(self, client, updated_after=None, after=None, **kwargs):
+        after_time = mainCron.parse_timestamp(updated_after)
+        changed = [record for record in self.records.values()
+                   if after_time is None or mainCron.parse_timestamp(record["updatedAt"]) > after_time]
+        yield changed, "end"
+    
+    def count(self, client, filter_attributes=None):
+        return len(self.records)
+
+
+def test_records_deleted_in_jobber_leave_the_cache(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    records = [dict(quote(str(i), f"Part {i}"), updatedAt="2024-05-01T12:00:00Z") for i in range(3)]
+    jobber = FakeJobber(records)
+    sync_cache = mainCron.empty_sync_cache()
+    
+    def sync():
+        inventories = mainCron.collect_inventory(None, "quotes", jobber.iter_pages, mainCron.extract_quote_inventory,
+                                                 sync_cache, formatted=False, resume=False, count_records=jobber.count)
+        return sorted(row["name"] for row in inventories[1].results("quotes"))
+    
+    assert sync() == ["Part 0", "Part 1", "Part 2"]
+    
+    del jobber.records["1"]
+    
+    assert sync() == ["Part 0", "Part 2"]
+    assert sorted(sync_cache["quotes"]["records"]) == ["0", "2"]
+    assert sync_cache["quotes"]["watermark"] == "2024-05-01T12:00:00Z"
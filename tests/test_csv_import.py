@@ -0,0 +1,23 @@
+import mainCron
+
+
+def test_csv_rows_are_deduplicated_and_sorted(tmp_path, monkeypatch):
+    csv_path = tmp_path / "inventory.csv"
+    csv_path.write_text("Name,Description,Category\n"
+                        "Widget,Blue widget,Parts\n"
+                        "AB-1234,Hinge,Parts\n"
+                        "Widget,Blue widget,Parts\n", encoding="utf-8")
+    uploads = []
+    monkeypatch.setattr(mainCron, "FORMATTED_SHEET_NAME", "Formatted")
+    monkeypatch.setattr(mainCron, "UNFORMATTED_SHEET_NAME", "Inventory")
+    monkeypatch.setattr(mainCron, "upload_inventory_targets", lambda targets: uploads.append(targets) or True)
+    
+    assert mainCron.upload_inventory_from_csv(str(csv_path))
+    
+    (formatted_name, formatted), (unformatted_name, unformatted) = uploads[0]
+    assert formatted_name == "Formatted" and unformatted_name == "Inventory"
+    assert formatted == [
+        {'sku': 'AB-1234', 'name': 'Hinge', 'description': 'Hinge', 'quotes_count': 0, 'jobs_count': 0},
+        {'sku': '', 'name': 'Widget', 'description': 'Blue widget', 'quotes_count': 0, 'jobs_count': 0},
+    ]
+    assert [(row['sku'], row['name']) for row in unformatted] == [("", "AB-1234"), ("", "Widget")]
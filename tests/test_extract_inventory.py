@@ -0,0 +1,199 @@
+import random
+
+import pytest
+
+from mainCron import SkuClassifier, extract_job_inventory, extract_quote_inventory
+
+
+# The per-record-type extractors that EXTRACTION_RULES replaced, as they were before the
+# refactor (comments trimmed). extract_inventory has to give exactly the same rows.
+
+def legacy_is_name_sku(name):
+    import re
+    if not name:
+        return False
+    if re.match(r'^[A-Z0-9-]+$', name) and len(name) >= 3:
+        common_words = ['AND', 'THE', 'FOR', 'WITH', 'FROM', 'UNIT', 'HAND', 'WIDE', 'LONG', 'HIGH', 'TALL']
+        if name not in common_words:
+            return True
+    return False
+
+
+class LegacyItem:
+    def __init__(self):
+        self.name = None
+        self.sku = None
+        self.description = None
+        self.source_location = None
+        self.category = None
+
+
+def legacy_fill_item(item, line_item, source_locations, formatData):
+    """The name/SKU/description part both legacy extractors shared line for line."""
+    if 'description' in line_item and line_item['description']:
+        item.description = line_item['description']
+        source_locations.append('lineItem.description')
+    
+    if 'name' in line_item and line_item['name']:
+        source_locations.append('lineItem.name')
+        if formatData and legacy_is_name_sku(line_item['name']):
+            item.sku = line_item['name']
+            if item.description:
+                item.name = item.description
+            else:
+                item.name = line_item['name']
+        else:
+            item.name = line_item['name']
+            if formatData:
+                item.sku = None
+    
+    if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
+        linked_item = line_item['linkedProductOrService']
+        if ('name' in linked_item and linked_item['name'] and
+                (not item.name or linked_item['name'] != item.name)):
+            source_locations.append('linkedProductOrService.name')
+            if formatData and not item.sku and legacy_is_name_sku(linked_item['name']):
+                item.sku = linked_item['name']
+                if item.description:
+                    item.name = item.description
+                else:
+                    item.name = linked_item['name']
+            else:
+                item.name = linked_item['name']
+        
+        if ('description' in linked_item and linked_item['description'] and
+                (item.description is None)):
+            item.description = linked_item['description']
+            source_locations.append('linkedProductOrService.description')
+    
+    item.source_location = ', '.join(source_locations)
+
+
+def legacy_process_quote_inventory(quote, formatData=True):
+    inventory_items = []
+    if 'lineItems' not in quote or 'nodes' not in quote['lineItems']:
+        return inventory_items
+    
+    for line_item in quote['lineItems']['nodes']:
+        source_locations = []
+        item = LegacyItem()
+        is_product = False
+        
+        if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
+            linked_item = line_item['linkedProductOrService']
+            if 'category' in linked_item and linked_item['category'] == 'PRODUCT':
+                is_product = True
+                item.category = 'PRODUCT'
+                source_locations.append('linkedProductOrService.category')
+        
+        if not is_product and 'name' in line_item and line_item['name']:
+            service_keywords = ['installation', 'labor', 'service', 'removal', 'maintenance',
+                                'repair', 'visit', 'rental', 'consultation', 'delivery']
+            name_lower = line_item['name'].lower()
+            if any(keyword in name_lower for keyword in service_keywords):
+                continue
+            item.category = 'UNKNOWN'
+            source_locations.append('lineItem.name (category unknown)')
+            is_product = True
+        
+        if not is_product:
+            continue
+        
+        legacy_fill_item(item, line_item, source_locations, formatData)
+        if item.name:
+            inventory_items.append(item)
+    
+    return inventory_items
+
+
+def legacy_process_job_inventory(job, formatData=True):
+    inventory_items = []
+    if 'lineItems' not in job or 'nodes' not in job['lineItems']:
+        return inventory_items
+    
+    for line_item in job['lineItems']['nodes']:
+        source_locations = []
+        item = LegacyItem()
+        is_product = False
+        
+        if 'category' in line_item and line_item['category'] == 'PRODUCT':
+            is_product = True
+            item.category = 'PRODUCT'
+            source_locations.append('lineItem.category')
+        
+        if 'linkedProductOrService' in line_item and line_item['linkedProductOrService']:
+            linked_item = line_item['linkedProductOrService']
+            if 'category' in linked_item and linked_item['category'] == 'PRODUCT':
+                is_product = True
+                item.category = 'PRODUCT'
+                source_locations.append('linkedProductOrService.category')
+        
+        if not is_product:
+            continue
+        
+        legacy_fill_item(item, line_item, source_locations, formatData)
+        if item.name:
+            inventory_items.append(item)
+    
+    return inventory_items
+
+
+NAMES = [None, "", "AB", "ABC", "ABC-123", "ABC-123 ", "X9", "THE", "UNIT", "Hinge", "Hinge ", "hinge", "Door Hinge",
+         "Installation", "Labor - 2h", "Service call", "Smoke detector", "Delivery fee", "SKU 12", "12345"]
+DESCRIPTIONS = [None, "", "Brass hinge", "Door Hinge", "Smoke detector", "ABC-123"]
+CATEGORIES = [None, "PRODUCT", "SERVICE"]
+
+
+def random_line_item(rng):
+    line_item = {}
+    for key, values in (("name", NAMES), ("description", DESCRIPTIONS), ("category", CATEGORIES)):
+        # Keys are sometimes missing altogether, as in records fetched with fewer fields
+        if rng.random() < 0.85:
+            line_item[key] = rng.choice(values)
+    
+    roll = rng.random()
+    if roll < 0.25:
+        line_item["linkedProductOrService"] = None
+    elif roll < 0.3:
+        line_item["linkedProductOrService"] = {}
+    elif roll < 0.9:
+        line_item["linkedProductOrService"] = {"name": rng.choice(NAMES), "description": rng.choice(DESCRIPTIONS),
+                                               "category": rng.choice(CATEGORIES)}
+    return line_item
+
+
+def random_record(rng):
+    if rng.random() < 0.05:
+        return {"id": "no-line-items"}
+    return {"id": "record", "lineItems": {"nodes": [random_line_item(rng) for _ in range(rng.randint(0, 6))]}}
+
+
+def rows(items):
+    return [(item.name, item.sku, item.description, item.category, item.source_location) for item in items]
+
+
+@pytest.mark.parametrize("extract, legacy", [
+    (extract_quote_inventory, legacy_process_quote_inventory),
+    (extract_job_inventory, legacy_process_job_inventory),
+], ids=["quotes", "jobs"])
+def test_extraction_rules_match_the_legacy_extractors(extract, legacy):
+    rng = random.Random(20240501)
+    
+    for _ in range(3000):
+        record = random_record(rng)
+        formatted, unformatted = extract(record)
+        
+        assert rows(formatted) == rows(legacy(record, formatData=True)), record
+        assert rows(unformatted) == rows(legacy(record, formatData=False)), record
+
+
+def test_sku_classifier_matches_the_legacy_check():
+    rng = random.Random(20240502)
+    names = [None, "", "AND", "THE", "TALL", "TALLER", "ABC\n", "ÀBC", "１２３"]
+    names += ["".join(rng.choice("ABCZ019-a z") for _ in range(rng.randint(1, 6))) for _ in range(5000)]
+    # A small cache so the memoized answers are evicted and recomputed along the way
+    classifier = SkuClassifier(cache_size=64)
+    
+    for name in names + names:
+        assert classifier(name) == legacy_is_name_sku(name), name
+    assert classifier.classify_many(names) == [legacy_is_name_sku(name) for name in names]
@@ -0,0 +1,67 @@
+import getterFunctions
+from getterFunctions import build_filter, build_line_items_query, fetch_remaining_line_items
+
+
+def test_line_items_query_aliases_one_field_per_record():
+    query = build_line_items_query("jobs", 2)
+    
+    assert "query FetchRemainingLineItems($limit: Int!, $id0: EncodedId!, $after0: String, " \
+           "$id1: EncodedId!, $after1: String)" in query
+    assert "r0: job(id: $id0) {\n    lineItems(first: $limit, after: $after0)" in query
+    assert "r1: job(id: $id1) {\n    lineItems(first: $limit, after: $after1)" in query
+    assert "r2:" not in query
+
+
+def test_created_after_is_sent_in_utc():
+    assert build_filter(created_after="2024-01-01") == {"createdAt": {"after": "2024-01-01T00:00:00Z"}}
+    assert build_filter(created_after="2024-01-01T09:30:00-05:00") == {"createdAt": {"after": "2024-01-01T14:30:00Z"}}
+
+
+def test_quotes_keep_a_larger_line_item_window_than_jobs():
+    assert getterFunctions.CONNECTION_SIZES["quotes"]["lineItems"] == 50
+    assert getterFunctions.CONNECTION_SIZES["jobs"]["lineItems"] == 10
+
+
+class LineItemClient:
+    """Serves the line items of each record id, limit at a time, with the offset as cursor."""
+    
+    def __init__(self, line_items):
+        self.line_items = line_items
+        self.requests = []
+    
+    def execute(self, payload, query_name, units=1, error_message=None):
+        variables = payload["variables"]
+        self.requests.append([variables[f"id{i}"] for i in range(units)])
+        data = {}
+        for i in range(units):
+            items = self.line_items.get(variables[f"id{i}"])
+            if items is None:
+                data[f"r{i}"] = None
+                continue
+            start = int(variables[f"after{i}"])
+            end = start + variables["limit"]
+            data[f"r{i}"] = {"lineItems": {"nodes": items[start:end],
+                                           "pageInfo": {"hasNextPage": end < len(items), "endCursor": str(end)}}}
+        return {"data": data}
+
+
+def record(record_id, line_items, window):
+    return {"id": record_id, "lineItems": {"nodes": line_items[:window],
+                                           "pageInfo": {"hasNextPage": len(line_items) > window,
+                                                        "endCursor": str(window)}}}
+
+
+def test_remaining_line_items_are_fetched_in_batches_until_complete():
+    line_items = {"a": list(range(25)), "b": list(range(3)), "c": list(range(12))}
+    client = LineItemClient(line_items)
+    records = [record(record_id, items, window=2) for record_id, items in line_items.items()]
+    # A record deleted since its page was fetched keeps what it has
+    records.append(record("gone", list(range(5)), window=2))
+    
+    added = fetch_remaining_line_items(client, "quotes", records, limit=10, batch_size=2)
+    
+    assert [r["lineItems"]["nodes"] for r in records[:3]] == [list(range(25)), list(range(3)), list(range(12))]
+    assert records[3]["lineItems"]["nodes"] == [0, 1]
+    assert added == 23 + 1 + 10
+    # Records that still have more line items go back in the queue behind the others
+    assert client.requests == [["a", "b"], ["c", "gone"], ["a"], ["a"]]
@@ -0,0 +1,133 @@
+import googleSheetsManager
+from googleSheetsManager import COLUMN_HEADERS, derived_formulas, plan_sheet_upload
+
+
+def item(name, quotes_count, jobs_count, sku="", description="d"):
+    return {'name': name, 'sku': sku, 'description': description, 'quotes_count': quotes_count, 'jobs_count': jobs_count}
+
+
+def plan(monkeypatch, rows, data, array_formulas):
+    monkeypatch.setattr(googleSheetsManager, "USE_ARRAY_FORMULAS", array_formulas)
+    monkeypatch.setattr(googleSheetsManager, "read_sheet_rows", lambda worksheet: rows)
+    _, pending_cells = plan_sheet_upload(None, data)
+    pending_cells.pop((1, 2))  # Last updated timestamp
+    return pending_cells
+
+
+def test_array_formulas_leave_spilled_cells_alone(monkeypatch):
+    total_allocated, available = derived_formulas(6, 0, 3, 4, 5, array_formulas=True)
+    rows = [COLUMN_HEADERS,
+            ["Bolt", "", "d", "", 1, 1, total_allocated, available],
+            # Spilled results read back as plain numbers, a leftover per-row formula doesn't
+            ["Nut", "", "d", "", 2, 1, 3, -1],
+            ["Washer", "", "d", "", 3, 1, "=E8+F8", "=D8-F8"]]
+    
+    pending_cells = plan(monkeypatch, rows, [item("Bolt", 1, 1), item("Nut", 2, 1), item("Washer", 3, 1),
+                                             item("Pin", 4, 0)], array_formulas=True)
+    
+    assert pending_cells == {
+        (8, 7): "", (8, 8): "",
+        (9, 1): "Pin", (9, 2): "", (9, 3): "d", (9, 4): "", (9, 5): 4, (9, 6): 0,
+    }
+
+
+def test_per_row_formulas_are_only_written_when_wrong(monkeypatch):
+    rows = [COLUMN_HEADERS,
+            ["Bolt", "", "d", "", 1, 1, "=E6+F6", "=D6-F6"],
+            ["Nut", "", "d", "", 2, 1, 3, -1]]
+    
+    pending_cells = plan(monkeypatch, rows, [item("Bolt", 1, 1), item("Nut", 2, 1)], array_formulas=False)
+    
+    assert pending_cells == {(7, 7): "=E7+F7", (7, 8): "=D7-F7"}
+
+
+class FakeSpreadsheet:
+    """Serves values.batchGet from the rows of each worksheet (from the header row down) and records every request."""
+    id = "sheet"
+    
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.requests = []
+        self.writes = []
+    
+    def worksheet(self, title):
+        return FakeWorksheet(self, title)
+    
+    def values_batch_get(self, ranges, params=None):
+        self.requests.append(ranges)
+        value_ranges = []
+        for range_name in ranges:
+            title, cells = range_name.split("!")
+            rows = self.sheets[title.strip("'")]
+            if cells == f"{googleSheetsManager.HEADER_ROW_OFFSET}:{googleSheetsManager.HEADER_ROW_OFFSET}":
+                rows = rows[:1]
+            else:
+                last_col = ord(cells.split(":")[1]) - ord("A")
+                rows = [row[:last_col + 1] for row in rows]
+            # Like the API, without trailing empty cells and rows
+            rows = [googleSheetsManager.trim_row(row) for row in rows]
+            while rows and not rows[-1]:
+                rows.pop()
+            value_ranges.append({"values": rows})
+        return {"valueRanges": value_ranges}
+    
+    def values_batch_update(self, body):
+        self.writes.append((body["valueInputOption"], [r["range"] for r in body["data"]]))
+
+
+class FakeWorksheet:
+    col_count = len(COLUMN_HEADERS)
+    
+    def __init__(self, spreadsheet, title):
+        self.spreadsheet = spreadsheet
+        self.title = title
+
+
+def test_mirror_is_only_trusted_until_it_is_too_old(tmp_path):
+    mirror_path = str(tmp_path / "mirror.json")
+    rows = [COLUMN_HEADERS, ["Bolt", "", "d", "", 1, 1, "=E6+F6", "=D6-F6"]]
+    spreadsheet = FakeSpreadsheet({"Inventory": rows})
+    worksheet = spreadsheet.worksheet("Inventory")
+    googleSheetsManager.save_sheet_mirror(worksheet, rows, mirror_path)
+    
+    assert googleSheetsManager.read_sheet_rows(worksheet, mirror_path, max_age=1) == rows
+    assert spreadsheet.requests == [["'Inventory'!5:5", "'Inventory'!A5:B"]]
+    
+    assert googleSheetsManager.read_sheet_rows(worksheet, mirror_path, max_age=0) == rows
+    assert spreadsheet.requests[1:] == [["'Inventory'!A5:H"]]
+
+
+def test_all_worksheets_are_read_with_one_request(tmp_path):
+    mirror_path = str(tmp_path / "mirror.json")
+    mirrored = [COLUMN_HEADERS, ["Bolt", "", "d", "", 1, 1, "=E6+F6", "=D6-F6"]]
+    spreadsheet = FakeSpreadsheet({"Inventory": mirrored, "Formatted": [COLUMN_HEADERS, ["Nut", "N-1"]]})
+    worksheets = [spreadsheet.worksheet("Inventory"), spreadsheet.worksheet("Formatted")]
+    googleSheetsManager.save_sheet_mirror(worksheets[0], mirrored, mirror_path)
+    
+    sheet_rows = googleSheetsManager.read_sheets_rows(spreadsheet, worksheets, mirror_path)
+    
+    assert spreadsheet.requests == [["'Inventory'!5:5", "'Inventory'!A5:B", "'Formatted'!A5:H"]]
+    # Rows are padded to the same width, like get_all_values
+    assert sheet_rows == {"Inventory": mirrored, "Formatted": [COLUMN_HEADERS, ["Nut", "N-1", "", "", "", "", "", ""]]}
+    
+    # Once a mirror no longer matches the sheet, that worksheet is read in full with one more request
+    spreadsheet.sheets["Inventory"] = mirrored + [["Washer", ""]]
+    googleSheetsManager.read_sheets_rows(spreadsheet, worksheets, mirror_path)
+    assert spreadsheet.requests[-1] == ["'Inventory'!A5:H"]
+
+
+def test_values_are_written_raw_and_only_formulas_are_parsed(monkeypatch):
+    spreadsheet = FakeSpreadsheet({"Inventory": [COLUMN_HEADERS]})
+    worksheet = spreadsheet.worksheet("Inventory")
+    monkeypatch.setattr(googleSheetsManager, "USE_ARRAY_FORMULAS", False)
+    monkeypatch.setattr(googleSheetsManager, "save_sheet_mirror", lambda worksheet, rows: None)
+    monkeypatch.setattr(googleSheetsManager, "load_sheet_mirrors", lambda mirror_path: {})
+    monkeypatch.setattr(googleSheetsManager.sheets_session, "get_worksheets", lambda names: {"Inventory": worksheet})
+    monkeypatch.setattr(googleSheetsManager.sheets_session, "get_spreadsheet", lambda: spreadsheet)
+    
+    # A SKU with a leading zero and a description that looks like a date
+    assert googleSheetsManager.upload_inventory_targets([("Inventory", [item("Bolt", 1, 1, sku="007", description="3/4")])])
+    
+    assert spreadsheet.requests == [["'Inventory'!A5:H"]]
+    assert spreadsheet.writes == [("RAW", ["'Inventory'!B1:B1", "'Inventory'!A6:F6"]),
+                                  ("USER_ENTERED", ["'Inventory'!G6:H6"])]
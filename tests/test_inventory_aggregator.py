@@ -0,0 +1,82 @@
+import pytest
+
+from mainCron import InventoryAggregator, InventoryItem
+
+
+def items(*rows):
+    return [InventoryItem(name=name, sku=sku, description=description, quantity=quantity)
+            for name, sku, description, quantity in rows]
+
+
+def test_combined_matches_the_combined_inventory():
+    aggregator = InventoryAggregator("count", "half_up")
+    aggregator.add(items(("Widget", None, "a", 1), ("Widget", "", "a", 1), ("Widget", None, "b", 1),
+                         ("Widget", None, "a", 1)), "quotes")
+    aggregator.add(items(("Bolt", "B-1", "x", 1), ("Widget", None, "a", 1), ("Widget", None, "a", 1)), "jobs")
+    
+    # A product's count is summed over all its descriptions, shown with the most common job description
+    assert aggregator.combined() == [
+        {'sku': 'B-1', 'name': 'Bolt', 'description': 'x', 'quotes_count': 0, 'jobs_count': 1},
+        {'sku': '', 'name': 'Widget', 'description': 'a', 'quotes_count': 4, 'jobs_count': 2},
+    ]
+
+
+def test_combined_sums_descriptions_instead_of_keeping_the_last_one():
+    aggregator = InventoryAggregator("count", "half_up")
+    aggregator.add(items(("Widget", "", "a", 1), ("Widget", "", "b", 1), ("Widget", "", "a", 1),
+                         ("Widget", "", "a", 1)), "quotes")
+    
+    # Old output: the sheet was built from these per-description rows, each one overwriting the
+    # product's quotes count, so it showed the count of the last (least common) description, 1
+    assert [(row['description'], row['count']) for row in aggregator.results("quotes")] == [("a", 3), ("b", 1)]
+    # New output: the counts of all descriptions
+    assert aggregator.combined() == [
+        {'sku': '', 'name': 'Widget', 'description': 'a', 'quotes_count': 4, 'jobs_count': 0},
+    ]
+
+
+def test_combined_description_falls_back_to_quotes_and_first_seen():
+    aggregator = InventoryAggregator("count", "half_up")
+    aggregator.add(items(("Widget", "", "b", 1), ("Widget", "", "a", 1), ("Widget", "", "a", 1),
+                         ("Widget", "", "b", 1)), "quotes")
+    
+    assert aggregator.combined() == [
+        {'sku': '', 'name': 'Widget', 'description': 'b', 'quotes_count': 4, 'jobs_count': 0},
+    ]
+
+
+def test_combined_order_does_not_depend_on_the_order_found():
+    rows = [("Zed", "sku1", "", 1), ("Abc", "SKU1", "", 1), ("widget", "", "", 1), ("Widget", "", "", 1)]
+    orders = []
+    for found in (rows, rows[::-1]):
+        aggregator = InventoryAggregator("count", "half_up")
+        aggregator.add(items(*found), "jobs")
+        orders.append([(row['sku'], row['name']) for row in aggregator.combined()])
+    
+    assert orders[0] == orders[1] == [("SKU1", "Abc"), ("sku1", "Zed"), ("", "Widget"), ("", "widget")]
+
+
+def test_results_count_each_description():
+    aggregator = InventoryAggregator("quantity", "ceil")
+    aggregator.add(items(("Pipe", "", "long", 1.5), ("Pipe", "", "short", 0.2), ("Pipe", "", "long", 2.0)))
+    
+    assert aggregator.results() == [
+        {"name": "Pipe", "sku": "", "count": 4, "description": "long"},
+        {"name": "Pipe", "sku": "", "count": 1, "description": "short"},
+    ]
+
+
+def test_dump_and_load_round_trip():
+    aggregator = InventoryAggregator("count", "half_up")
+    aggregator.add(items(("Widget", "", "a", 1), ("Bolt", "B-1", "x", 1), ("Widget", "", "a", 1)), "jobs")
+    
+    restored = InventoryAggregator("count", "half_up")
+    restored.load(aggregator.dump("jobs"), "jobs")
+    
+    assert restored.dump("jobs") == aggregator.dump("jobs") == [["Widget", "", "a", 2], ["Bolt", "B-1", "x", 1]]
+    assert restored.combined() == aggregator.combined()
+
+
+def test_unknown_rounding_policy_fails_before_counting():
+    with pytest.raises(ValueError, match="rounding"):
+        InventoryAggregator("quantity", "nearest")
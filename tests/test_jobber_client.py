@@ -0,0 +1,112 @@
+import pytest
+
+import queryCost
+from jobberClient import JobberClient
+from queryCost import ThrottleBucket
+
+
+def cost(requested, available, maximum=1000, restore_rate=50):
+    return {"extensions": {"cost": {"requestedQueryCost": requested, "actualQueryCost": requested,
+                                    "throttleStatus": {"maximumAvailable": maximum, "currentlyAvailable": available,
+                                                       "restoreRate": restore_rate}}}}
+
+
+THROTTLED = {"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}], **cost(300, 100)}
+
+
+class FakeClock:
+    """Stands in for time in queryCost so waiting for the bucket is instant and measurable."""
+    
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+    
+    def monotonic(self):
+        return self.now
+    
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(queryCost, "time", clock)
+    return clock
+
+
+class FakeResponse:
+    status_code = 200
+    
+    def __init__(self, data):
+        self.data = data
+        self.text = str(data)
+    
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.posts = 0
+    
+    def post(self, url, json=None):
+        self.posts += 1
+        return FakeResponse(self.responses.pop(0))
+
+
+def test_first_request_of_a_query_is_not_gated(clock):
+    bucket = ThrottleBucket(maximum_available=1000, restore_rate=50)
+    bucket.available = 0
+    
+    # Nothing is known about the query yet, so it is estimated at 0 and sent right away
+    assert bucket.estimate("Fetch Quotes", 10) == 0
+    assert bucket.acquire(bucket.estimate("Fetch Quotes", 10)) == 0
+    assert clock.sleeps == []
+
+
+def test_update_resyncs_the_bucket_and_learns_the_unit_cost(clock):
+    bucket = ThrottleBucket(maximum_available=1000, restore_rate=50)
+    
+    bucket.update(cost(200, 300, maximum=2000, restore_rate=100), "Fetch Quotes", units=10)
+    
+    assert (bucket.available, bucket.maximum_available, bucket.restore_rate) == (300, 2000, 100)
+    assert bucket.estimate("Fetch Quotes", 5) == 100
+    assert bucket.update({"data": {}}) is None
+
+
+def test_acquire_waits_for_the_missing_points(clock):
+    bucket = ThrottleBucket(maximum_available=1000, restore_rate=50)
+    bucket.update(cost(200, 100), "Fetch Quotes", units=10)
+    
+    waited = bucket.acquire(bucket.estimate("Fetch Quotes", 10))
+    
+    # 100 points short at 50 points per second
+    assert waited == pytest.approx(2.0)
+    assert bucket.available == pytest.approx(0.0)
+    # A request can never wait for more than a full bucket
+    bucket.acquire(5000)
+    assert clock.now == pytest.approx(22.0)
+
+
+def test_throttled_requests_are_retried_until_they_go_through(clock):
+    client = JobberClient("token", throttle=ThrottleBucket(), max_throttle_retries=2)
+    client.session = FakeSession([THROTTLED, THROTTLED, {"data": {"quotes": {}}, **cost(300, 700)}])
+    
+    response = client.execute({"query": ""}, "Fetch Quotes", units=10)
+    
+    assert response["data"] == {"quotes": {}}
+    assert client.session.posts == 3
+    # Each retry waited for the 200 points the throttled request was missing
+    assert clock.sleeps == [pytest.approx(4.0), pytest.approx(4.0)]
+
+
+def test_throttled_requests_give_up_after_the_retry_limit(clock):
+    client = JobberClient("token", throttle=ThrottleBucket(), max_throttle_retries=2)
+    client.session = FakeSession([THROTTLED] * 4)
+    
+    with pytest.raises(Exception, match="Failed to fetch quotes: still throttled after 2 retries"):
+        client.execute({"query": ""}, "Fetch Quotes", units=10, error_message="Failed to fetch quotes")
+    assert client.session.posts == 3
@@ -0,0 +1,26 @@
+from syncCache import empty_sync_cache, fetch_updated_after, merge_records
+
+
+def test_incremental_fetch_overlaps_the_watermark():
+    cache = empty_sync_cache()
+    assert fetch_updated_after(cache["jobs"]) is None
+    
+    # 12:30 at +01:00 sorts after 12:00Z as a string but is half an hour earlier
+    merge_records(cache["jobs"], [{"id": "1", "updatedAt": "2024-05-01T12:00:00Z"},
+                                  {"id": "2", "updatedAt": "2024-05-01T12:30:05+01:00"}])
+    
+    assert cache["jobs"]["watermark"] == "2024-05-01T12:00:00Z"
+    assert fetch_updated_after(cache["jobs"], overlap=60) == "2024-05-01T11:59:00Z"
+    assert fetch_updated_after({"watermark": "2024-05-01T13:30:05+01:00"}, overlap=5) == "2024-05-01T12:30:00Z"
+
+
+def test_records_fetched_again_in_the_overlap_are_not_counted_twice():
+    cache = empty_sync_cache()
+    merge_records(cache["quotes"], [{"id": "1", "updatedAt": "2024-05-01T12:00:00Z"}])
+    
+    # The next run fetches record 1 again alongside the record updated in the same second
+    new_count = merge_records(cache["quotes"], [{"id": "1", "updatedAt": "2024-05-01T12:00:00Z"},
+                                                {"id": "2", "updatedAt": "2024-05-01T12:00:00Z"}])
+    
+    assert new_count == 1
+    assert sorted(cache["quotes"]["records"]) == ["1", "2"]
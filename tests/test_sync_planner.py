@@ -0,0 +1,89 @@
+import syncPlanner
+from queryCost import ThrottleBucket
+
+
+def cost(points):
+    return {"cost": {"requestedQueryCost": points, "actualQueryCost": points,
+                     "throttleStatus": {"maximumAvailable": 10000, "currentlyAvailable": 10000, "restoreRate": 500}}}
+
+
+class FakeClient:
+    """Answers counts, sample pages and line item follow-ups, and records what was asked."""
+    
+    def __init__(self, counts=None, more_line_items=False):
+        self.counts = counts or {"quotes": 120, "jobs": 80}
+        self.more_line_items = more_line_items
+        self.calls = []
+    
+    def execute(self, payload, query_name, units=1, error_message=None):
+        variables = payload.get("variables") or {}
+        self.calls.append((query_name, variables))
+        connection = "quotes" if "Quote" in query_name else "jobs"
+        if query_name == "Fetch Remaining Line Items":
+            return {"data": {f"r{i}": {"lineItems": {"nodes": [{}], "pageInfo": {"hasNextPage": False, "endCursor": "c"}}}
+                             for i in range(units)},
+                    "extensions": cost(5 * units)}
+        if query_name.startswith("Fetch"):
+            nodes = [{"id": f"{connection}-{i}",
+                      "lineItems": {"nodes": [], "pageInfo": {"hasNextPage": self.more_line_items and i == 0,
+                                                              "endCursor": "c"}}}
+                     for i in range(units)]
+            return {"data": {connection: {"nodes": nodes, "pageInfo": {"hasNextPage": False, "endCursor": None}}},
+                    "extensions": cost(100 * units)}
+        return {"data": {connection: {"totalCount": self.counts[connection]}}, "extensions": cost(1)}
+
+
+def count_filters(client):
+    return [variables.get("filter") for name, variables in client.calls if "Count" in name]
+
+
+def test_full_sync_counts_with_the_server_filters(monkeypatch):
+    monkeypatch.setattr(syncPlanner, "CREATED_AFTER", "2024-01-01")
+    client = FakeClient()
+    
+    count = syncPlanner.count_sync_records(client, syncPlanner.SYNC_STREAMS["quotes"][0], ["approved", "draft"])
+    
+    assert count == 240
+    assert count_filters(client) == [{"status": "approved", "createdAt": {"after": "2024-01-01T00:00:00Z"}},
+                                     {"status": "draft", "createdAt": {"after": "2024-01-01T00:00:00Z"}}]
+
+
+def test_incremental_sync_counts_every_change(monkeypatch):
+    monkeypatch.setattr(syncPlanner, "CREATED_AFTER", "2024-01-01")
+    client = FakeClient()
+    cache = {"quotes": {"watermark": None}, "jobs": {"watermark": "2024-05-01T00:00:00Z"}}
+    
+    plan = syncPlanner.plan_sync(client, cache, concurrent=False, throttle=ThrottleBucket())
+    
+    # The first incremental run fetches everything unfiltered, later ones every change since just before the watermark
+    assert count_filters(client) == [None, {"updatedAt": {"after": "2024-04-30T23:59:00Z"}}]
+    assert plan["streams"]["quotes"]["records"] == 120
+    assert plan["concurrent"] is False
+
+
+def test_cost_per_record_includes_line_item_follow_ups():
+    client = FakeClient(more_line_items=True)
+    
+    page_cost, follow_up_cost = syncPlanner.measure_cost_per_record(client, "jobs", syncPlanner.SYNC_STREAMS["jobs"][1],
+                                                                    sample_size=10)
+    
+    assert page_cost == 100
+    # One of the ten sample records needed one follow-up request for one record
+    assert follow_up_cost == 0.5
+    assert [name for name, _ in client.calls] == ["Fetch Jobs", "Fetch Remaining Line Items"]
+
+
+def test_plan_never_changes_the_requested_schedule():
+    plan = syncPlanner.plan_sync(FakeClient(), concurrent=False, throttle=ThrottleBucket())
+    
+    assert plan["concurrent"] is False
+
+
+def test_unforced_plan_picks_the_faster_schedule():
+    # Small enough to fit the bucket, so only the round trips count and they overlap when concurrent
+    plan = syncPlanner.plan_sync(FakeClient(counts={"quotes": 20, "jobs": 20}), throttle=ThrottleBucket())
+    assert plan["concurrent"] is True
+    
+    # Far over the bucket, so both schedules wait for the same restores and the simpler one is kept
+    plan = syncPlanner.plan_sync(FakeClient(counts={"quotes": 2000, "jobs": 2000}), throttle=ThrottleBucket())
+    assert plan["concurrent"] is False
@@ -20,6 +20,9 @@ a = Analysis(
         'queryCost',
         'config',
         'googleSheetsManager',
+        'syncCache',
+        'jobberClient',
+        'syncPlanner',
         'requests',
         'json',
         'pprint',